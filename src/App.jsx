@@ -15,6 +15,7 @@ const App = () => {
 	const [currentPage, setCurrentPage] = useState("landing");
 	const [user, setUser] = useState(null);
 	const [ocrResult, setOcrResult] = useState(null);
+	const [ocrProgress, setOcrProgress] = useState(null);
 	const [chatMessages, setChatMessages] = useState([]);
 	const [inputMessage, setInputMessage] = useState("");
 	const [isSidebarOpen, setIsSidebarOpen] = useState(true);
@@ -191,21 +192,54 @@ What specific aspect would you like me to explain?`;
 	};
 
 	// OCR handlers
+	// Read the NDJSON stream from the OCR endpoint: progress lines, then the result
+	const readOcrStream = async (response) => {
+		if (
+			!response.body ||
+			!response.headers.get("content-type")?.includes("ndjson")
+		) {
+			return response.json();
+		}
+
+		const reader = response.body.getReader();
+		const decoder = new TextDecoder();
+		let buffer = "";
+		let result = null;
+		for (;;) {
+			const { value, done } = await reader.read();
+			if (value) buffer += decoder.decode(value, { stream: true });
+			const lines = buffer.split("\n");
+			buffer = done ? "" : lines.pop();
+			for (const line of lines) {
+				if (!line.trim()) continue;
+				const message = JSON.parse(line);
+				if (message.type === "progress") {
+					setOcrProgress(message);
+				} else {
+					result = message;
+				}
+			}
+			if (done) break;
+		}
+		return result;
+	};
+
 	const handleFileUpload = async (file) => {
+		setOcrProgress(null);
 		try {
 			const formData = new FormData();
 			formData.append("file", file);
 			formData.append("user_id", user?.email || "anonymous");
 
 			const response = await fetch(
-				"http://localhost:5001/api/ocr/process",
+				"http://localhost:5001/api/ocr/process?stream=1",
 				{
 					method: "POST",
 					body: formData,
 				}
 			);
 
-			const result = await response.json();
+			const result = await readOcrStream(response);
 
 			if (result.success) {
 				// Transform the OCR result to match frontend expectations
@@ -353,6 +387,7 @@ What specific aspect would you like me to explain?`;
 					<div className={mainContentClass}>
 						<OcrPage
 							handleFileUpload={handleFileUpload}
+							ocrProgress={ocrProgress}
 							handleLogout={handleLogout}
 							setCurrentPage={setCurrentPage}
 							setOcrResult={setOcrResult}
@@ -0,0 +1,55 @@
+"""
+Annotated text blocks: sentences, tokens and POS tags computed once per block
+
+Cleaning, OCR correction and content analysis all need the same sentence
+splits, tokens and part-of-speech tags. An Annotator produces them once per
+text block (a page's native text or one OCR'd image) and the resulting
+AnnotatedText travels with the block, so analysis aggregates over existing
+annotations instead of re-tokenizing and re-tagging the combined document.
+"""
+import threading
+
+
+class AnnotatedText:
+    """A text block and its sentences, each a (sentence text, [(token, tag), ...]) pair
+
+    sentences is None for blocks produced without NLTK (or restored from the
+    result cache); Annotator.ensure() annotates those on demand.
+    """
+    __slots__ = ('text', 'sentences')
+
+    def __init__(self, text, sentences=None):
+        self.text = text
+        self.sentences = sentences
+
+    def tagged_tokens(self):
+        for _, tagged in self.sentences or ():
+            yield from tagged
+
+
+class Annotator:
+    """NLTK sentence splitting and tokenization plus one shared POS tagger"""
+
+    def __init__(self):
+        self._tagger = None
+        self._lock = threading.Lock()
+
+    @property
+    def tagger(self):
+        if self._tagger is None:
+            with self._lock:
+                if self._tagger is None:
+                    from nltk.tag import PerceptronTagger
+                    self._tagger = PerceptronTagger()
+        return self._tagger
+
+    def annotate(self, text):
+        from nltk.tokenize import sent_tokenize, word_tokenize
+        sentences = sent_tokenize(text)
+        # Already split into sentences, so skip word_tokenize's own sentence pass
+        tokens = [word_tokenize(sentence, preserve_line=True) for sentence in sentences]
+        return AnnotatedText(text, list(zip(sentences, self.tagger.tag_sents(tokens))))
+
+    def ensure(self, block):
+        """block itself if annotated, otherwise a freshly annotated copy of its text"""
+        return block if block.sentences is not None else self.annotate(block.text)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the edit distance kernels on typical OCR token lengths
+
+Compares the original pure-Python DP with the banded, bit-parallel and NumPy batch
+kernels, both on single pairs and on one query scored against a candidate set the
+size the spell index usually returns. Results are verified against the DP.
+
+    python benchmarks/bench_edit_distance.py [--pairs 2000] [--max-d 2]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_distance import levenshtein_dp, banded_levenshtein, myers_levenshtein, batch_levenshtein
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(LETTERS) for _ in range(length))
+
+
+def mutate(rng, word, edits):
+    for _ in range(edits):
+        i = rng.randrange(len(word) + 1)
+        op = rng.choice('sid')
+        if op == 's' and i < len(word):
+            word = word[:i] + rng.choice(LETTERS) + word[i+1:]
+        elif op == 'd' and i < len(word) and len(word) > 1:
+            word = word[:i] + word[i+1:]
+        else:
+            word = word[:i] + rng.choice(LETTERS) + word[i:]
+    return word
+
+
+def make_pairs(rng, length, count):
+    """Half near misses (1-3 edits), half unrelated words of similar length"""
+    pairs = []
+    for k in range(count):
+        a = random_word(rng, length)
+        if k % 2:
+            b = mutate(rng, a, rng.randint(1, 3))
+        else:
+            b = random_word(rng, max(1, length + rng.randint(-2, 2)))
+        pairs.append((a, b))
+    return pairs
+
+
+def time_pairs(fn, pairs, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for a, b in pairs:
+            fn(a, b)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pairs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=2000, help='Pairs per token length')
+    parser.add_argument('--candidates', type=int, default=200, help='Candidate set size for the batch test')
+    parser.add_argument('--max-d', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    max_d = args.max_d
+    kernels = {
+        'dp (original)': levenshtein_dp,
+        'banded(max_d)': lambda a, b: banded_levenshtein(a, b, max_d),
+        'myers': myers_levenshtein,
+        'myers(max_d)': lambda a, b: myers_levenshtein(a, b, max_d),
+    }
+
+    report = {'max_d': max_d, 'pairs_per_length': args.pairs, 'single_pair_us': {}, 'one_vs_many_us': {}}
+    for length in (3, 5, 8, 12, 15):
+        pairs = make_pairs(rng, length, args.pairs)
+        expected = [levenshtein_dp(a, b) for a, b in pairs]
+        for name, fn in kernels.items():
+            got = [fn(a, b) for a, b in pairs]
+            want = expected if 'max_d' not in name else [min(e, max_d + 1) for e in expected]
+            if got != want:
+                sys.exit(f"{name} disagrees with the DP at length {length}")
+        report['single_pair_us'][length] = {
+            name: round(time_pairs(fn, pairs), 2) for name, fn in kernels.items()
+        }
+
+        # One query against a candidate set, as in SymSpellIndex verification
+        query = random_word(rng, length)
+        candidates = [mutate(rng, query, rng.randint(0, 4)) for _ in range(args.candidates)]
+        expected = [min(levenshtein_dp(query, c), max_d + 1) for c in candidates]
+        if list(batch_levenshtein(query, candidates, max_d)) != expected:
+            sys.exit(f"batch_levenshtein disagrees with the DP at length {length}")
+        timings = {}
+        for name, fn in (('dp (original)', lambda: [levenshtein_dp(query, c) for c in candidates]),
+                         ('myers(max_d)', lambda: [myers_levenshtein(query, c, max_d) for c in candidates]),
+                         ('numpy batch(max_d)', lambda: batch_levenshtein(query, candidates, max_d))):
+            best = float('inf')
+            for _ in range(5):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = round(best * 1e6, 1)
+        report['one_vs_many_us'][length] = timings
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
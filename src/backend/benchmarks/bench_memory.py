@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Check that peak memory of process_file does not grow with document length
+
+Builds native, scanned and page-render (vector drawings, no text layer or
+images) PDFs at two lengths and reports the peak traced allocation of
+process_file(include_full_text=False) for each, with the growth per extra page.
+Streaming extraction, bounded image memoisation and incremental analysis should
+keep that growth to roughly the size of the text the result itself returns.
+Scanned and page-render documents need tesseract and are skipped without it.
+
+    python benchmarks/bench_memory.py [--pages 20 80] [--executor thread]
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+import pytesseract
+
+import corpus
+from ocr_wrapper import OCRPipeline, EXECUTOR_MODES
+
+
+def vector_pdf(path, pages, rng):
+    """Pages of filled vector shapes only, which the router sends to page_render"""
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        for row in range(12):
+            x0 = rng.randint(40, 200)
+            y0 = 80 + row * 55
+            page.draw_rect(fitz.Rect(x0, y0, x0 + rng.randint(150, 340), y0 + 30),
+                           color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+    doc.save(path)
+    doc.close()
+
+
+KINDS = {
+    'native': lambda path, pages, rng: corpus.native_pdf(path, pages, rng),
+    'scanned': lambda path, pages, rng: corpus.scanned_pdf(path, pages, rng, 'light', 0),
+    'page_render': vector_pdf,
+}
+
+
+def peak_mb(ocr, path):
+    """Peak traced allocation (MB) while processing path, after a warm-up run"""
+    ocr.process_file(path, cache_mode='bypass', include_full_text=False)
+    tracemalloc.start()
+    try:
+        ocr.process_file(path, cache_mode='bypass', include_full_text=False)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs=2, default=[20, 80], metavar=('SHORT', 'LONG'))
+    parser.add_argument('--executor', choices=EXECUTOR_MODES, default='sequential')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        tesseract = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract = None
+
+    ocr = OCRPipeline(executor_mode=args.executor, nltk_download=False)
+    report = {'executor': args.executor, 'tesseract': tesseract, 'documents': {}, 'skipped': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for kind, build in KINDS.items():
+            if kind != 'native' and not tesseract:
+                report['skipped'][kind] = 'tesseract not installed'
+                continue
+            peaks = {}
+            for pages in args.pages:
+                path = os.path.join(directory, f'{kind}_{pages}p.pdf')
+                build(path, pages, random.Random(args.seed))
+                peaks[pages] = round(peak_mb(ocr, path), 2)
+            short, long = args.pages
+            report['documents'][kind] = {
+                'peak_mb': peaks,
+                'kb_per_extra_page': round((peaks[long] - peaks[short]) * 1024 / (long - short), 1)
+            }
+    ocr.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-image OCR cost of each engine: pooled tesserocr vs pytesseract
+
+Renders small text images (the embedded figures and snippets that dominate
+slide decks) and times each available engine over all of them, sequentially
+and from a thread pool. With small images the per-call overhead (process
+start, traineddata load, temporary files) is most of pytesseract's time.
+
+    python benchmarks/bench_ocr_engine.py [--images 50] [--size 400x120] [--workers 4]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import corpus
+from ocr_engine import create_engine, ENGINES
+
+
+def make_images(count, width, height, seed=0):
+    rng = random.Random(seed)
+    return [np.asarray(corpus.render_text_image(corpus.sentences(rng, 2), width, height,
+                                                noise='clean', seed=seed + i))
+            for i in range(count)]
+
+
+def timed_run(engine, images, workers):
+    start = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(engine.image_to_data, images))
+    else:
+        results = [engine.image_to_data(img) for img in images]
+    elapsed = time.perf_counter() - start
+    words = sum(1 for data in results for text in data['text'] if text.strip())
+    return {'seconds': round(elapsed, 3),
+            'ms_per_image': round(elapsed * 1000 / len(images), 1),
+            'words': words}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=50)
+    parser.add_argument('--size', default='400x120', help='WIDTHxHEIGHT of each image')
+    parser.add_argument('--workers', type=int, default=4, help='Threads for the pooled run')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    images = make_images(args.images, width, height)
+    report = {'images': args.images, 'size': [width, height], 'engines': {}, 'skipped': {}}
+    for name in ENGINES[1:]:
+        try:
+            start = time.perf_counter()
+            engine = create_engine(name, pool_size=args.workers)
+            setup = time.perf_counter() - start
+        except Exception as e:
+            report['skipped'][name] = str(e)
+            continue
+        try:
+            engine.image_to_data(images[0])  # warm up
+            report['engines'][name] = {
+                'setup_ms': round(setup * 1000, 1),
+                'sequential': timed_run(engine, images, 1),
+                f'threads_{args.workers}': timed_run(engine, images, args.workers)
+            }
+        except Exception as e:
+            report['skipped'][name] = str(e)
+        finally:
+            engine.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
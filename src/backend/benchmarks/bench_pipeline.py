@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the OCR pipeline stages on a synthetic corpus
+
+Builds (or reuses) the deterministic corpus from benchmarks/corpus.py and times
+spell_check, correct_text, analyze_content, process_image, process_pdf and
+process_file separately, with caches cold for every run. Results, together with
+the git commit and environment, are written as JSON so runs can be compared
+across commits. Stages that need tesseract are skipped when it is not installed,
+and NLTK data is never downloaded.
+
+    python benchmarks/bench_pipeline.py                          # writes benchmarks/results/<commit>.json
+    python benchmarks/bench_pipeline.py --compare results/abc.json
+    python benchmarks/bench_pipeline.py --words words.txt        # dictionary when NLTK data is missing
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import pytesseract
+
+import corpus
+from ocr_wrapper import OCRPipeline, EXECUTOR_MODES
+from ocr_engine import ENGINES
+from spell_index import SymSpellIndex
+
+
+def timed(fn, repeat):
+    """Best and median wall time of fn over `repeat` runs"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {'best_s': round(min(runs), 4), 'median_s': round(statistics.median(runs), 4),
+            'runs': len(runs)}
+
+
+def git_state():
+    """(commit, dirty) of the working tree, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--', '..'], cwd=BENCH_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def tesseract_version():
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+
+def load_corpus(directory, seed, scale):
+    """Reuse the corpus in directory if it was built with the same seed/scale"""
+    try:
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if (manifest['seed'], manifest['scale']) == (seed, scale) and all(
+                os.path.exists(d['path']) for d in manifest['documents']):
+            return manifest['documents']
+    except (OSError, ValueError, KeyError):
+        pass
+    return corpus.build_corpus(directory, seed, scale)
+
+
+def compare(report, baseline_path):
+    """Per-stage best-time ratio against an earlier report (>1 means slower now)"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    ratios = {}
+    for stage, timing in report['stages'].items():
+        old = baseline.get('stages', {}).get(stage)
+        if old and old['best_s']:
+            ratios[stage] = round(timing['best_s'] / old['best_s'], 3)
+    return {'baseline_commit': baseline.get('git_commit'), 'ratio': ratios}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', default=os.path.join(tempfile.gettempdir(), 'ocr-bench-corpus'),
+                        help='Corpus directory (built if missing or stale)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=int, default=1, help='Multiplier for multi-page document sizes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--executor', choices=EXECUTOR_MODES, default='sequential')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--ocr-engine', choices=ENGINES, default='auto')
+    parser.add_argument('--words', help='Plain word list used as the dictionary instead of NLTK')
+    parser.add_argument('--output', help='Report path (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier report to compare against')
+    args = parser.parse_args()
+
+    documents = load_corpus(args.corpus, args.seed, args.scale)
+    commit, dirty = git_state()
+    tesseract = tesseract_version()
+
+    start = time.perf_counter()
+    ocr = OCRPipeline(executor_mode=args.executor, max_workers=args.workers, nltk_download=False,
+                      ocr_engine=args.ocr_engine)
+    init_s = time.perf_counter() - start
+    dictionary = 'nltk'
+    if args.words:
+        with open(args.words, encoding='utf-8') as f:
+            ocr.english_words = {line.strip() for line in f if line.strip()}
+        ocr.spell_index = SymSpellIndex(ocr.english_words, ocr.word_freq)
+        dictionary = 'words-file'
+
+    rng = random.Random(args.seed)
+    clean_text = ' '.join(corpus.sentences(rng, 200))
+    noisy_text = corpus.ocr_noise(clean_text, rng)
+    tokens = sorted({w.strip('.').lower() for w in noisy_text.split()} - set(corpus.VOCABULARY))
+
+    def cold(fn):
+        def run():
+            ocr.correction_cache.clear()
+            fn()
+        return run
+
+    def spell_all():
+        for token in tokens:
+            ocr.spell_check(token)
+
+    stages = {}
+    skipped = {}
+    stages['pipeline_init'] = {'best_s': round(init_s, 4), 'median_s': round(init_s, 4), 'runs': 1}
+    stages['spell_check:cold'] = {**timed(cold(spell_all), args.repeat), 'tokens': len(tokens)}
+    stages['spell_check:warm'] = {**timed(spell_all, args.repeat), 'tokens': len(tokens)}
+    stages['correct_text'] = {**timed(cold(lambda: ocr.correct_text(noisy_text)), args.repeat),
+                              'words': len(noisy_text.split())}
+    stages['analyze_content'] = {**timed(lambda: ocr.analyze_content(clean_text), args.repeat),
+                                 'words': len(clean_text.split())}
+
+    for doc in documents:
+        name, path = doc['name'], doc['path']
+        if doc['kind'] != 'native_pdf' and not tesseract:
+            skipped[name] = 'tesseract not installed'
+            continue
+        if doc['kind'] == 'image':
+            stages[f'process_image:{name}'] = timed(cold(lambda: ocr.process_image(path)), args.repeat)
+        else:
+            timing = timed(cold(lambda: ocr.process_pdf(path)), args.repeat)
+            stages[f'process_pdf:{name}'] = {**timing, 'pages': doc['pages'],
+                                             'pages_per_sec': round(doc['pages'] / timing['best_s'], 2)}
+        stages[f'process_file:{name}'] = timed(
+            cold(lambda: ocr.process_file(path, cache_mode='bypass')), args.repeat)
+    # 'auto' resolves to tesserocr only when it is installed and initialises
+    ocr_engine = ocr._get_ocr_engine().name if tesseract else None
+    ocr.close()
+
+    report = {
+        'git_commit': commit,
+        'git_dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'tesseract': tesseract,
+        'nltk_available': ocr.nltk_available,
+        'dictionary': {'source': dictionary, 'size': len(ocr.english_words)},
+        'config': {'seed': args.seed, 'scale': args.scale, 'repeat': args.repeat,
+                   'executor': args.executor, 'workers': ocr.max_workers,
+                   'ocr_engine': args.ocr_engine},
+        'ocr_engine': ocr_engine,
+        'stages': stages,
+        'skipped': skipped
+    }
+    if args.compare:
+        report['comparison'] = compare(report, args.compare)
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"{(commit or 'nogit')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark image preprocessing on large scans: PIL/RGB path vs the grayscale path
+
+Synthesises a scanned page (text on a noisy, unevenly lit background), encodes it
+as PNG and JPEG, and times the original PIL decode -> RGB -> Contrast -> Sharpness
+-> NumPy -> BGR chain against preprocess.prepare_for_ocr. Each path also runs in a
+fresh child process to report its peak RSS growth.
+
+    python benchmarks/bench_preprocess.py [--width 4000] [--height 3000] [--dpi 600]
+"""
+import os
+import io
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFont
+
+from preprocess import image_info, prepare_for_ocr
+
+LINE = 'The quick brown fox jumps over the lazy dog while OCR engines count pixels'
+
+
+def make_scan(width, height, dpi, fmt, seed=0):
+    """Encoded bytes of a synthetic scanned text page"""
+    rng = np.random.default_rng(seed)
+    lighting = np.linspace(215, 250, width, dtype=np.float32)[None, :]
+    page = lighting + rng.normal(0, 6, (height, width)).astype(np.float32)
+    img = Image.fromarray(np.clip(page, 0, 255).astype(np.uint8)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=max(12, height // 60))
+    except TypeError:
+        font = ImageFont.load_default()
+    step = max(16, height // 40)
+    for y in range(step, height - step, step):
+        draw.text((width // 20, y), LINE, fill=(30, 30, 30), font=font)
+    buf = io.BytesIO()
+    img.save(buf, fmt, dpi=(dpi, dpi))
+    return buf.getvalue()
+
+
+def pil_path(data):
+    """The original preprocessing chain"""
+    pil_img = Image.open(io.BytesIO(data)).convert('RGB')
+    pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
+    pil_img = ImageEnhance.Sharpness(pil_img).enhance(2.0)
+    return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+
+
+def gray_path(data):
+    return prepare_for_ocr(data, image_info(data)[2])
+
+
+PATHS = {'pil_rgb (original)': pil_path, 'grayscale': gray_path}
+
+
+def peak_rss_kb():
+    """Peak RSS of this process in KB
+
+    /proc's VmHWM starts afresh at exec, whereas ru_maxrss is inherited from the
+    (large) parent process on Linux, so prefer it where available.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_rss(name, data):
+    """Peak RSS growth (MB) of one preprocessing call, in a fresh process"""
+    code = (
+        'import sys; sys.path.insert(0, sys.argv[1]);'
+        'import bench_preprocess as b;'
+        'data = sys.stdin.buffer.read();'
+        'before = b.peak_rss_kb();'
+        'b.PATHS[sys.argv[2]](data);'
+        'print(b.peak_rss_kb() - before)'
+    )
+    out = subprocess.run([sys.executable, '-c', code, os.path.dirname(os.path.abspath(__file__)), name],
+                         input=data, capture_output=True, check=True)
+    kb = int(out.stdout.decode().strip().splitlines()[-1])
+    return round(kb / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--dpi', type=int, default=600, help='DPI recorded in the scan metadata')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    report = {'size': [args.width, args.height], 'dpi': args.dpi, 'formats': {}}
+    for fmt in ('PNG', 'JPEG'):
+        data = make_scan(args.width, args.height, args.dpi, fmt)
+        results = {}
+        for name, fn in PATHS.items():
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                out = fn(data)
+                best = min(best, time.perf_counter() - start)
+            results[name] = {
+                'ms': round(best * 1000, 1),
+                'output_shape': list(out.shape),
+                'output_mb': round(out.nbytes / 2**20, 1),
+                'peak_rss_growth_mb': measure_rss(name, data)
+            }
+        report['formats'][fmt] = {'encoded_mb': round(len(data) / 2**20, 1), 'paths': results}
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
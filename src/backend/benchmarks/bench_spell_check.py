@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Spell-check equivalence check and benchmark: SymSpellIndex vs the linear dictionary scan
+
+Generates noisy OCR-like tokens from the dictionary, corrects them with both the
+original brute-force scan and the symmetric-delete index at max_d=1 and 2, and exits
+non-zero if any result differs.
+
+    python benchmarks/bench_spell_check.py                   # NLTK dictionaries
+    python benchmarks/bench_spell_check.py --words words.txt # plain word list
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_distance import levenshtein_dp
+from spell_index import SymSpellIndex
+
+# Typical OCR confusions plus random edits
+OCR_CONFUSIONS = [('m', 'rn'), ('d', 'cl'), ('w', 'vv'), ('l', '1'), ('o', '0'), ('e', 'c'), ('h', 'li')]
+
+
+def linear_spell_check(word, english_words, word_freq, max_d):
+    """Reference implementation: the original full dictionary scan, with the full DP distance"""
+    candidates = []
+    for w in english_words:
+        if abs(len(w) - len(word)) <= max_d:
+            dist = levenshtein_dp(word, w)
+            if dist <= max_d:
+                candidates.append((w, dist, word_freq.get(w, 1)))
+
+    if candidates:
+        return sorted(candidates, key=lambda x: (x[1], -x[2], x[0]))[0][0]
+    return word
+
+
+def make_queries(english_words, count, seed):
+    """Deterministic noisy tokens that are not dictionary words"""
+    rng = random.Random(seed)
+    pool = sorted(w for w in english_words if w.isalpha() and w.islower() and 3 <= len(w) <= 14)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    queries = []
+    while len(queries) < count:
+        word = rng.choice(pool)
+        for _ in range(rng.randint(1, 2)):
+            if rng.random() < 0.4:
+                src, dst = rng.choice(OCR_CONFUSIONS)
+                if src in word:
+                    word = word.replace(src, dst, 1)
+                    continue
+            i = rng.randrange(len(word))
+            op = rng.choice('sid')
+            if op == 's':
+                word = word[:i] + rng.choice(letters) + word[i+1:]
+            elif op == 'i':
+                word = word[:i] + rng.choice(letters) + word[i:]
+            elif len(word) > 2:
+                word = word[:i] + word[i+1:]
+        word = word.lower()
+        if word.isalpha() and word not in english_words:
+            queries.append(word)
+    return queries
+
+
+def load_dictionaries(words_path):
+    if words_path:
+        with open(words_path, encoding='utf-8') as f:
+            english_words = {line.strip() for line in f if line.strip()}
+        return english_words, Counter()
+
+    from ocr_wrapper import OCRPipeline
+    ocr = OCRPipeline()
+    if not ocr.english_words:
+        sys.exit("NLTK dictionaries unavailable; pass --words <file>")
+    return ocr.english_words, ocr.word_freq
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', help='Plain word list (one word per line) instead of NLTK')
+    parser.add_argument('--queries', type=int, default=100, help='Number of noisy tokens')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    english_words, word_freq = load_dictionaries(args.words)
+
+    start = time.perf_counter()
+    index = SymSpellIndex(english_words, word_freq, max_distance=2)
+    build_time = time.perf_counter() - start
+
+    queries = make_queries(english_words, args.queries, args.seed)
+    report = {'dictionary_size': len(english_words), 'index_build_s': round(build_time, 3),
+              'index_keys': len(index.deletes), 'queries': len(queries), 'results': {}}
+    mismatches = []
+
+    for max_d in (1, 2):
+        start = time.perf_counter()
+        expected = [linear_spell_check(q, english_words, word_freq, max_d) for q in queries]
+        linear_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [index.lookup(q, max_d) or q for q in queries]
+        index_time = time.perf_counter() - start
+
+        mismatches += [(max_d, q, e, a) for q, e, a in zip(queries, expected, actual) if e != a]
+        report['results'][f'max_d={max_d}'] = {
+            'linear_ms_per_token': round(linear_time / len(queries) * 1000, 3),
+            'index_ms_per_token': round(index_time / len(queries) * 1000, 3),
+            'speedup': round(linear_time / max(index_time, 1e-9), 1),
+        }
+
+    report['mismatches'] = [
+        {'max_d': d, 'token': q, 'linear': e, 'index': a} for d, q, e, a in mismatches
+    ]
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic corpus for the OCR pipeline benchmarks
+
+Generates, from a seed and entirely offline, the kinds of documents students
+upload: rendered text images with controlled noise, native-text PDFs, scanned
+PDFs (one full-page image per page) and slide decks mixing native text with
+embedded text images, a repeated logo and decorative backgrounds. A
+manifest.json next to the files describes every document.
+
+    python benchmarks/corpus.py --output /tmp/ocr-corpus [--seed 0] [--scale 1]
+"""
+import io
+import os
+import sys
+import json
+import random
+import argparse
+
+import fitz
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+VOCABULARY = (
+    'the of and to in is that for it as was with be by on not this are or from at which '
+    'an but have has had were can more also their other its into only these such may '
+    'between most after used each two first new because through during however both '
+    'analysis theory model system process function structure energy cell data method '
+    'equation variable result system learning student concept example problem solution '
+    'chapter section figure table lecture course history economic market population '
+    'reaction molecule protein neural network algorithm matrix vector probability '
+    'distribution experiment hypothesis evidence variable measurement temperature '
+    'pressure velocity acceleration force momentum current voltage resistance '
+    'government society culture language literature philosophy argument principle '
+    'development environment organism evolution selection genetic inheritance '
+    'carbon oxygen hydrogen nitrogen membrane nucleus enzyme metabolism photosynthesis'
+).split()
+
+# Character-level confusions typical of OCR output
+OCR_CONFUSIONS = [('m', 'rn'), ('d', 'cl'), ('w', 'vv'), ('l', '1'), ('o', '0'),
+                  ('e', 'c'), ('h', 'li'), ('s', '5'), ('i', 'l')]
+
+NOISE_LEVELS = {
+    # gaussian sigma, blur radius, skew degrees, salt-and-pepper fraction
+    'clean': (0, 0, 0.0, 0.0),
+    'light': (8, 0.6, 0.8, 0.002),
+    'heavy': (20, 1.1, 2.0, 0.01),
+}
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+
+def sentences(rng, count):
+    """Plausible-looking sentences drawn from VOCABULARY"""
+    out = []
+    for _ in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 14))]
+        words[0] = words[0].capitalize()
+        out.append(' '.join(words) + '.')
+    return out
+
+
+def ocr_noise(text, rng, rate=0.15):
+    """Apply OCR-style character confusions to roughly `rate` of the words"""
+    words = text.split(' ')
+    for i, word in enumerate(words):
+        if rng.random() < rate:
+            src, dst = rng.choice(OCR_CONFUSIONS)
+            if src in word:
+                words[i] = word.replace(src, dst, 1)
+    return ' '.join(words)
+
+
+def render_text_image(lines, width, height, noise='light', seed=0, font_size=22):
+    """Grayscale page image of `lines` degraded according to NOISE_LEVELS[noise]"""
+    sigma, blur, skew, salt = NOISE_LEVELS[noise]
+    img = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    font = _font(font_size)
+    y = font_size
+    for line in lines:
+        if y > height - 2 * font_size:
+            break
+        draw.text((font_size, y), line, fill=20, font=font)
+        y += int(font_size * 1.6)
+
+    if skew:
+        img = img.rotate(skew, resample=Image.BILINEAR, fillcolor=255)
+    if blur:
+        img = img.filter(ImageFilter.GaussianBlur(blur))
+    if sigma or salt:
+        rng = np.random.default_rng(seed)
+        pixels = np.asarray(img, dtype=np.float32)
+        pixels = pixels + rng.normal(0, sigma, pixels.shape) if sigma else pixels
+        if salt:
+            mask = rng.random(pixels.shape)
+            pixels[mask < salt / 2] = 0
+            pixels[mask > 1 - salt / 2] = 255
+        img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return img
+
+
+def _wrap(text, width):
+    """Greedy word wrap into lines of at most `width` characters"""
+    lines, line = [], ''
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f'{line} {word}'.strip()
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _png(img):
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def _save_pdf(doc, path):
+    doc.set_metadata({})
+    doc.save(path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+
+
+def native_pdf(path, pages, rng):
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        text = f'Chapter {n + 1}\n\n' + '\n\n'.join(' '.join(sentences(rng, 5)) for _ in range(4))
+        page.insert_textbox(fitz.Rect(60, 60, page.rect.width - 60, page.rect.height - 60),
+                            text, fontsize=11)
+    _save_pdf(doc, path)
+
+
+def scanned_pdf(path, pages, rng, noise, seed):
+    """One full-page 150 DPI scan per page, as produced by a document scanner"""
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        lines = _wrap(' '.join(sentences(rng, 30)), 80)
+        img = render_text_image(lines, 1240, 1754, noise, seed=seed + n, font_size=24)
+        page.insert_image(page.rect, stream=_png(img))
+    _save_pdf(doc, path)
+
+
+def mixed_deck(path, slides, rng, seed):
+    """Slides with a native title and bullets, a text screenshot, a repeated logo and a gradient"""
+    logo = Image.new('RGB', (96, 96), (30, 80, 160))
+    ImageDraw.Draw(logo).ellipse((16, 16, 80, 80), fill=(240, 200, 40))
+    logo_png = _png(logo)
+    gradient = _png(Image.fromarray(np.tile(np.linspace(180, 255, 800, dtype=np.uint8), (450, 1))))
+
+    doc = fitz.open()
+    for n in range(slides):
+        page = doc.new_page(width=960, height=540)
+        page.insert_image(page.rect, stream=gradient)
+        page.insert_image(fitz.Rect(860, 20, 940, 100), stream=logo_png)
+        title = ' '.join(rng.choice(VOCABULARY) for _ in range(4)).title()
+        bullets = '\n'.join(f'- {s}' for s in sentences(rng, 4))
+        page.insert_textbox(fitz.Rect(40, 30, 840, 110), title, fontsize=26)
+        page.insert_textbox(fitz.Rect(40, 120, 500, 500), bullets, fontsize=13)
+        screenshot = render_text_image(_wrap(' '.join(sentences(rng, 6)), 40), 520, 380,
+                                       'light', seed=seed + n, font_size=20)
+        page.insert_image(fitz.Rect(520, 130, 920, 420), stream=_png(screenshot))
+    _save_pdf(doc, path)
+
+
+def build_corpus(directory, seed=0, scale=1):
+    """Write the corpus into directory and return its manifest (a list of documents)"""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    documents = []
+
+    def add(name, kind, pages, **extra):
+        documents.append({'name': name, 'path': os.path.join(directory, name),
+                          'kind': kind, 'pages': pages, **extra})
+
+    for i, noise in enumerate(NOISE_LEVELS):
+        name = f'image_{noise}.png'
+        lines = _wrap(' '.join(sentences(rng, 20)), 70)
+        render_text_image(lines, 1240, 900, noise, seed=seed + i).save(os.path.join(directory, name))
+        add(name, 'image', 1, noise=noise)
+
+    for pages in (1, 5 * scale, 20 * scale):
+        name = f'native_{pages}p.pdf'
+        native_pdf(os.path.join(directory, name), pages, rng)
+        add(name, 'native_pdf', pages)
+
+    for pages, noise in ((1, 'light'), (3 * scale, 'heavy')):
+        name = f'scanned_{pages}p_{noise}.pdf'
+        scanned_pdf(os.path.join(directory, name), pages, rng, noise, seed)
+        add(name, 'scanned_pdf', pages, noise=noise)
+
+    for slides in (4 * scale, 12 * scale):
+        name = f'deck_{slides}p.pdf'
+        mixed_deck(os.path.join(directory, name), slides, rng, seed)
+        add(name, 'mixed_deck', slides)
+
+    manifest = {'seed': seed, 'scale': scale, 'documents': documents}
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', required=True, help='Directory to write the corpus to')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=int, default=1, help='Multiplier for multi-page document sizes')
+    args = parser.parse_args()
+    documents = build_corpus(args.output, args.seed, args.scale)
+    json.dump({'documents': len(documents), 'pages': sum(d['pages'] for d in documents)},
+              sys.stdout)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Incremental content analysis over a document's text blocks
+
+A ContentAnalyzer is fed the document's AnnotatedText blocks as pages are
+produced and keeps only running totals: word and complex-word counts, noun
+frequencies in a bounded top-k sketch, and the first few proper nouns. Blocks
+can be dropped as soon as they are added, so analysis memory does not grow
+with document length. result() gives the same concepts, key topics,
+difficulty and reading time as analysing the concatenated text at once.
+
+Blocks are added with a group (native text 0, OCR text 1). Ties between
+equally frequent concepts, and the order of key topics, follow (group,
+position), which is the order of the blocks in the concatenated
+extracted_text (native text first, then OCR text), whatever order the pages
+interleave them in.
+"""
+import heapq
+
+# Distinct terms tracked by the frequency sketch; counts are exact below this
+SKETCH_CAPACITY = 2000
+CONCEPTS = 8
+FALLBACK_CONCEPTS = 6
+KEY_TOPICS = 5
+FALLBACK_KEY_TOPICS = 3
+# Words longer than this count towards the difficulty estimate
+COMPLEX_WORD_LENGTH = 8
+WORDS_PER_MINUTE = 200
+
+BASIC_STOPWORDS = frozenset({'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of',
+                             'with', 'by', 'this', 'that', 'these', 'those'})
+
+
+class SpaceSaving:
+    """Space-Saving top-k frequency sketch (Metwally et al.) with O(1) updates
+
+    At most `capacity` items are tracked. A new item arriving when full replaces
+    one with the smallest count and inherits that count (+1) as its
+    overestimate, so every frequent item is kept and counts are exact until the
+    capacity is first exceeded. Items carry the smallest order key they were
+    added with, used to break ties.
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY):
+        self.capacity = capacity
+        self._items = {}     # item -> [count, order]
+        self._buckets = {}   # count -> {item: None}, oldest first
+        self._min = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _move(self, item, old, new):
+        bucket = self._buckets[old]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[old]
+            if self._min == old:
+                self._min = new
+        self._buckets.setdefault(new, {})[item] = None
+
+    def add(self, item, order):
+        entry = self._items.get(item)
+        if entry is not None:
+            self._move(item, entry[0], entry[0] + 1)
+            entry[0] += 1
+            if order < entry[1]:
+                entry[1] = order
+            return
+        if len(self._items) < self.capacity:
+            self._items[item] = [1, order]
+            self._buckets.setdefault(1, {})[item] = None
+            self._min = 1
+            return
+        # Evict the oldest of the least frequent items
+        count = self._min
+        bucket = self._buckets[count]
+        victim = next(iter(bucket))
+        del bucket[victim]
+        del self._items[victim]
+        self._items[item] = [count + 1, order]
+        self._buckets.setdefault(count + 1, {})[item] = None
+        if not bucket:
+            del self._buckets[count]
+            self._min = count + 1
+
+    def most_common(self, n):
+        """[(item, count), ...] by count, ties by first occurrence"""
+        top = heapq.nsmallest(n, self._items.items(), key=lambda kv: (-kv[1][0], kv[1][1]))
+        return [(item, entry[0]) for item, entry in top]
+
+
+class ContentAnalyzer:
+    """Running analysis of a document; add() blocks, then result()
+
+    annotator is the pipeline's Annotator, or None when NLTK is unavailable,
+    in which case concepts come from plain word frequencies.
+    """
+
+    def __init__(self, annotator, stop_words, capacity=SKETCH_CAPACITY):
+        self.annotator = annotator
+        self.stop_words = stop_words if annotator else BASIC_STOPWORDS
+        self.word_count = 0
+        self.complex_words = 0
+        self._nouns = SpaceSaving(capacity)
+        self._words = SpaceSaving(capacity)
+        self._proper_nouns = {}  # group -> {word: position}, the group's first KEY_TOPICS
+        self._position = 0
+        self._tagged = annotator is not None
+
+    def add(self, block, group=0):
+        """Fold one AnnotatedText block into the running totals"""
+        words = block.text.split()
+        if not words:
+            return
+        self.word_count += len(words)
+        self.complex_words += sum(len(w) > COMPLEX_WORD_LENGTH for w in words)
+
+        if self._tagged:
+            try:
+                self._add_tagged(self.annotator.ensure(block), group)
+                return
+            except Exception:
+                # Tagging unavailable: fall back to plain word frequencies from here on
+                self._tagged = False
+        for word in words:
+            # Length and stopword checks see the word with its punctuation, as before
+            lower = word.lower()
+            if len(word) > 4 and lower not in self.stop_words:
+                self._words.add(lower.strip('.,!?;:'), (group, self._position))
+            self._position += 1
+
+    def _add_tagged(self, block, group):
+        stop_words = self.stop_words
+        for word, pos in block.tagged_tokens():
+            order = (group, self._position)
+            self._position += 1
+            if not pos.startswith('NN'):
+                continue
+            if len(word) > 3:
+                lower = word.lower()
+                if lower not in stop_words:
+                    self._nouns.add(lower, order)
+            if pos == 'NNP' and len(word) > 2:
+                # Only the first KEY_TOPICS of a group can ever be reported
+                topics = self._proper_nouns.setdefault(group, {})
+                if len(topics) < KEY_TOPICS and word not in topics:
+                    topics[word] = order
+
+    def result(self, confidence=None):
+        """The analyze_content dict for everything added so far
+
+        confidence, the document's recognition confidence (0-1), is reported as
+        confidence_score; without it the score is estimated from the amount of
+        text found.
+        """
+        if not self.word_count:
+            return {
+                "concepts": [],
+                "difficulty": "Unknown",
+                "word_count": 0,
+                "estimated_reading_time": 0,
+                "key_topics": [],
+                "confidence_score": 0.0
+            }
+
+        if self._tagged:
+            concepts = [word.title() for word, freq in self._nouns.most_common(CONCEPTS) if freq > 1]
+            first = {}
+            for group in sorted(self._proper_nouns):
+                for word, order in self._proper_nouns[group].items():
+                    first.setdefault(word, order)
+            key_topics = sorted(first, key=first.get)[:KEY_TOPICS]
+        else:
+            concepts = [word.title() for word, _ in self._words.most_common(FALLBACK_CONCEPTS)]
+            key_topics = concepts[:FALLBACK_KEY_TOPICS]
+
+        complexity_ratio = self.complex_words / self.word_count
+        if complexity_ratio > 0.15:
+            difficulty = "Advanced"
+        elif complexity_ratio > 0.08:
+            difficulty = "Intermediate"
+        else:
+            difficulty = "Beginner"
+
+        if confidence is None:
+            confidence = min(1.0, max(0.1, (self.word_count / 100) * 0.8 + (len(concepts) / 10) * 0.2))
+
+        return {
+            "concepts": concepts,
+            "difficulty": difficulty,
+            "word_count": self.word_count,
+            "estimated_reading_time": max(1, round(self.word_count / WORDS_PER_MINUTE)),
+            "key_topics": key_topics,
+            "confidence_score": round(confidence, 2)
+        }
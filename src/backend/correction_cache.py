@@ -0,0 +1,124 @@
+"""
+Bounded LRU cache of spell-check corrections, optionally persisted to disk
+"""
+import os
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+
+CACHE_FORMAT_VERSION = 1
+
+
+class CorrectionCache:
+    """LRU map of (normalized token, max distance) -> correction
+
+    Shared by every document a pipeline processes, so a misread token such as
+    "rnodel" is only searched for once per worker. When a path is given the
+    entries are loaded on startup and written back by save(), letting a
+    restarted worker start warm. With record_updates set, new entries and lookup
+    counts are also kept for take_updates(), so a correction process can hand
+    them back to the pipeline that owns the persisted cache.
+    """
+
+    def __init__(self, max_size=50000, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.record_updates = False
+        self._updates = []
+        self._reported = (0, 0)
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token, max_d):
+        """Cached correction for token, or None on a miss"""
+        key = (token, max_d)
+        with self._lock:
+            correction = self._entries.get(key)
+            if correction is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return correction
+
+    def put(self, token, max_d, correction):
+        with self._lock:
+            self._entries[(token, max_d)] = correction
+            self._entries.move_to_end((token, max_d))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            if self.record_updates:
+                self._updates.append((token, max_d, correction))
+
+    def clear(self):
+        """Drop all entries and reset the hit/miss counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self._dirty = True
+
+    def take_updates(self):
+        """(new entries, hits, misses) since the last call"""
+        with self._lock:
+            entries, self._updates = self._updates, []
+            hits, misses = self.hits - self._reported[0], self.misses - self._reported[1]
+            self._reported = (self.hits, self.misses)
+        return entries, hits, misses
+
+    def merge(self, entries, hits=0, misses=0):
+        """Fold in another cache's take_updates()"""
+        for token, max_d, correction in entries:
+            self.put(token, max_d, correction)
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size
+        }
+
+    def load(self):
+        """Load persisted entries (least recently used first); a bad file is ignored"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_FORMAT_VERSION:
+                return
+            with self._lock:
+                for token, max_d, correction in data.get('entries', [])[-self.max_size:]:
+                    self._entries[(token, max_d)] = correction
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def save(self):
+        """Atomically write the entries to disk if anything changed since the last save"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            entries = [[token, max_d, correction] for (token, max_d), correction in self._entries.items()]
+            self._dirty = False
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_FORMAT_VERSION, 'entries': entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
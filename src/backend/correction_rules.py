@@ -0,0 +1,121 @@
+"""
+OCR correction rules declared as data and compiled into single-pass matchers
+
+Each rule set is compiled once into one alternation of named groups, so a block
+of text is corrected in one regex scan whatever the number of rules. Rules use
+lookarounds rather than capture groups, which keeps every replacement a constant
+string and lets the matching group's name identify the rule for hit counting.
+Token rules are grouped by POS tag prefix, and the digit-to-letter fixes are a
+single str.translate table.
+"""
+import re
+from collections import namedtuple
+
+# counted: whether a match is an OCR correction (reported in corrections_applied)
+# rather than whitespace/punctuation formatting
+Rule = namedtuple('Rule', 'name pattern replacement counted', defaults=(True,))
+
+# Whole-text fixes for OCR output when NLTK is unavailable
+SIMPLE_RULES = [
+    Rule('rn_to_m', r'rn', 'm'),
+    Rule('cl_to_d', r'cl', 'd'),
+    Rule('vv_to_w', r'vv', 'w'),
+    Rule('the', r'\btl[l1]e\b', 'the'),
+    Rule('inner_1_to_l', r'(?<=\w)1(?=\w)', 'l'),
+    Rule('inner_0_to_o', r'(?<=\w)0(?=\w)', 'o'),
+    Rule('space_before_punct', r'\s+(?=[,.!?;:])', '', counted=False),
+    Rule('collapse_space', r'\s+', ' ', counted=False),
+]
+
+# Token fixes applied in correct_text, keyed by POS tag prefix (first match wins)
+POS_RULES = {
+    'NN': [Rule('noun_rn_to_m', r'rn', 'm'),
+           Rule('noun_cl_to_d', r'cl', 'd')],
+    'VB': [Rule('verb_1ng', r'1ng', 'ing')],
+    'DT': [Rule('the', r'^(?i:tl[l1]e)$', 'the')],
+}
+
+# Digits misread inside alphabetic tokens
+DIGIT_LETTERS = ('0158', 'olSB')
+
+# Layout clean-up of native PDF text: collapse whitespace, split camelCase runs,
+# and make sure sentence punctuation is followed by a space
+NATIVE_TEXT_RULES = [
+    Rule('collapse_space', r'\s+', ' ', counted=False),
+    Rule('split_camel', r'(?<=[a-z])(?=[A-Z])', ' ', counted=False),
+    Rule('space_after_punct', r'(?<=\w[.!?])', ' ', counted=False),
+]
+
+# Re-spacing of a sentence rebuilt from tokens
+SENTENCE_RULES = [
+    Rule('space_before_punct', r'\s+(?=[,.!?;:])', '', counted=False),
+    Rule('space_after_punct', r'(?<=[,.!?;:])\s*(?=[A-Za-z])', ' ', counted=False),
+]
+
+
+class RuleSet:
+    """A list of rules compiled into one alternation; earlier rules win ties"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._replacements = {}
+        self._counted = set()
+        parts = []
+        for i, rule in enumerate(self.rules):
+            group = f'r{i}'
+            self._replacements[group] = rule.replacement
+            if rule.counted:
+                self._counted.add(group)
+            parts.append(f'(?P<{group}>{rule.pattern})')
+        self._names = {f'r{i}': rule.name for i, rule in enumerate(self.rules)}
+        self.pattern = re.compile('|'.join(parts))
+        if self.pattern.groups != len(self.rules):
+            raise ValueError("Correction rule patterns must not contain capturing groups")
+
+    def apply(self, text, hits=None):
+        """Apply every rule in one scan, adding per-rule match counts to hits"""
+        if hits is None:
+            return self.pattern.sub(lambda m: self._replacements[m.lastgroup], text)
+
+        def replace(match):
+            group = match.lastgroup
+            replacement = self._replacements[group]
+            if group in self._counted and match.group() != replacement:
+                hits[self._names[group]] += 1
+            return replacement
+        return self.pattern.sub(replace, text)
+
+
+class CorrectionRules:
+    """All correction rule sets, compiled once per pipeline"""
+
+    def __init__(self, simple_rules=SIMPLE_RULES, pos_rules=POS_RULES, digit_letters=DIGIT_LETTERS,
+                 native_rules=NATIVE_TEXT_RULES, sentence_rules=SENTENCE_RULES):
+        self.simple = RuleSet(simple_rules)
+        self.native = RuleSet(native_rules)
+        self.sentence = RuleSet(sentence_rules)
+        self._pos_rules = [(prefix, RuleSet(rules)) for prefix, rules in pos_rules.items()]
+        self._pos_cache = {}
+        self._digit_chars = frozenset(digit_letters[0])
+        self._digit_table = str.maketrans(*digit_letters)
+
+    def _rules_for(self, pos):
+        try:
+            return self._pos_cache[pos]
+        except KeyError:
+            ruleset = next((rs for prefix, rs in self._pos_rules if pos.startswith(prefix)), None)
+            self._pos_cache[pos] = ruleset
+            return ruleset
+
+    def correct_token(self, word, pos, hits=None):
+        """POS-conditioned fixes, then digit-to-letter fixes for mixed tokens"""
+        ruleset = self._rules_for(pos)
+        if ruleset is not None:
+            word = ruleset.apply(word, hits)
+        if not word.isalpha() and any(c.isdigit() for c in word) and any(c.isalpha() for c in word):
+            fixed = word.translate(self._digit_table)
+            if fixed != word and hits is not None:
+                hits['digit_to_letter'] += sum(c in self._digit_chars for c in word)
+            word = fixed
+        return word
+
@@ -0,0 +1,152 @@
+"""
+Edit distance kernels used by the spell checker
+
+All kernels return the exact Levenshtein distance. When max_d is given they may stop
+early, and any distance above max_d is reported as max_d + 1.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def levenshtein_dp(s1, s2):
+    """Textbook O(n*m) dynamic programme (reference implementation)"""
+    if len(s1) < len(s2):
+        return levenshtein_dp(s2, s1)
+    if not s2:
+        return len(s1)
+
+    prev = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        curr = [i + 1]
+        for j, c2 in enumerate(s2):
+            ins, dele, sub = prev[j+1]+1, curr[j]+1, prev[j]+(c1!=c2)
+            curr.append(min(ins, dele, sub))
+        prev = curr
+    return prev[-1]
+
+
+def banded_levenshtein(s1, s2, max_d):
+    """Ukkonen band: only cells with |i - j| <= max_d, stopping once a row exceeds max_d"""
+    n, m = len(s1), len(s2)
+    if abs(n - m) > max_d:
+        return max_d + 1
+    if not s1 or not s2:
+        return max(n, m)
+
+    inf = max_d + 1
+    prev = [j if j <= max_d else inf for j in range(m + 1)]
+    for i in range(1, n + 1):
+        lo, hi = max(1, i - max_d), min(m, i + max_d)
+        curr = [inf] * (m + 1)
+        curr[0] = i if i <= max_d else inf
+        c1 = s1[i - 1]
+        row_min = curr[0]
+        for j in range(lo, hi + 1):
+            d = prev[j - 1] + (c1 != s2[j - 1])
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if curr[j - 1] + 1 < d:
+                d = curr[j - 1] + 1
+            curr[j] = d if d < inf else inf
+            if d < row_min:
+                row_min = d
+        if row_min > max_d:
+            return inf
+        prev = curr
+    return min(prev[m], inf)
+
+
+def myers_levenshtein(s1, s2, max_d=None):
+    """Bit-parallel Levenshtein distance (Myers 1999 / Hyyro 2001)
+
+    The shorter string becomes a bit-vector pattern (Python ints, so any length) and
+    each character of the longer string updates a whole DP column in a handful of
+    integer operations. With max_d the scan stops as soon as the remaining characters
+    can no longer bring the distance back under the threshold.
+    """
+    if len(s1) > len(s2):
+        s1, s2 = s2, s1
+    m, n = len(s1), len(s2)
+    if max_d is not None and n - m > max_d:
+        return max_d + 1
+    if not m:
+        return n
+
+    peq = {}
+    for i, c in enumerate(s1):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    remaining = n
+    for c in s2:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        remaining -= 1
+        if max_d is not None and score - remaining > max_d:
+            return max_d + 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+
+def levenshtein(s1, s2, max_d=None):
+    """Calculate edit distance between strings"""
+    return myers_levenshtein(s1, s2, max_d)
+
+
+def batch_levenshtein(query, candidates, max_d=None):
+    """Distances from query to every candidate at once, as a NumPy int array
+
+    Candidates are packed into a (n, longest) code-point matrix and the DP advances one
+    query character at a time over all of them; the in-row insertion dependency is
+    resolved with a prefix-minimum scan, so each row is a few vectorised operations.
+    """
+    if np is None:
+        raise RuntimeError("batch_levenshtein requires numpy")
+
+    n = len(candidates)
+    lengths = np.fromiter((len(c) for c in candidates), dtype=np.int32, count=n)
+    if not n:
+        return lengths
+    width = int(lengths.max())
+    if not query or not width:
+        dist = np.abs(lengths - len(query))
+        return np.minimum(dist, max_d + 1) if max_d is not None else dist
+
+    codes = np.array(candidates, dtype=f'<U{width}').view(np.int32).reshape(n, width)
+    cols = np.arange(width + 1, dtype=np.int32)
+    valid = cols[None, :] <= lengths[:, None]
+    rows = np.arange(n)
+
+    prev = np.tile(cols, (n, 1))
+    step = np.empty_like(prev)
+    alive = np.ones(n, dtype=bool)
+    for i, c in enumerate(query, 1):
+        step[:, 0] = i
+        np.minimum(prev[:, 1:] + 1, prev[:, :-1] + (codes != ord(c)), out=step[:, 1:])
+        step -= cols
+        prev = np.minimum.accumulate(step, axis=1)
+        prev += cols
+        if max_d is not None:
+            # Distances never decrease along a path, so a row minimum above max_d is final
+            alive &= np.where(valid, prev, max_d + 1).min(axis=1) <= max_d
+            if not alive.any():
+                break
+
+    dist = prev[rows, lengths]
+    if max_d is not None:
+        dist = np.where(alive, np.minimum(dist, max_d + 1), max_d + 1)
+    return dist
@@ -0,0 +1,83 @@
+"""
+Cheap triage of embedded images before they are handed to tesseract
+
+Decks and reports embed many images that cannot contain readable text: bullets,
+icons, solid backgrounds, gradients and photos. A few NumPy reductions on a
+downsampled grayscale copy are enough to reject most of them for a fraction of
+the cost of enhancement plus a tesseract run.
+"""
+import numpy as np
+
+# Smallest image tesseract can read a line of text from
+MIN_SIDE = 12
+MIN_PIXELS = 1024
+# Grayscale standard deviation below which an image is a flat fill
+MIN_STD = 6.0
+# Neighbouring pixels differing by more than this count as an edge
+EDGE_STEP = 32
+# Fraction of edge pixels below which an image is a smooth gradient or blur
+MIN_EDGE_DENSITY = 0.004
+# Edges of a short caption on a large, mostly empty image ("Q&A", an equation)
+# are sparse overall but packed inside their bounding box: at least this many
+# edge pixels at this density within the box keep the image, whatever its size
+MIN_TEXT_EDGE_PIXELS = 64
+MIN_TEXT_BOX_DENSITY = 0.05
+# Longest side the statistics are computed on
+TRIAGE_SIDE = 512
+
+
+def _edge_map(gray):
+    """Boolean map of strong horizontal/vertical intensity steps"""
+    gray = gray.astype(np.int16)
+    edges = np.zeros(gray.shape, dtype=bool)
+    edges[:, 1:] |= np.abs(np.diff(gray, axis=1)) > EDGE_STEP
+    edges[1:, :] |= np.abs(np.diff(gray, axis=0)) > EDGE_STEP
+    return edges
+
+
+def has_compact_edges(edges):
+    """True if the edges are numerous and concentrated enough to be a line of text"""
+    count = int(edges.sum())
+    if count < MIN_TEXT_EDGE_PIXELS:
+        return False
+    rows = np.flatnonzero(edges.any(axis=1))
+    cols = np.flatnonzero(edges.any(axis=0))
+    box = (rows[-1] - rows[0] + 1) * (cols[-1] - cols[0] + 1)
+    return count / box >= MIN_TEXT_BOX_DENSITY
+
+
+def text_likelihood(edges):
+    """Score how line-structured the edges are (roughly 0 for photos, >1 for text)
+
+    Printed text concentrates edges in horizontal bands separated by empty
+    leading, so the per-row edge counts vary far more than in natural images.
+    """
+    rows = edges.sum(axis=1).astype(np.float64)
+    mean = rows.mean()
+    if not mean:
+        return 0.0
+    return float(rows.std() / mean)
+
+
+def triage_image(width, height, gray=None, min_text_score=None):
+    """Reason to skip OCR on an image, or None if it is worth OCR'ing
+
+    width/height are checked first so tiny images are rejected before decoding;
+    gray is a 2-D uint8 array of the image. min_text_score additionally rejects
+    images whose text_likelihood falls below it.
+    """
+    if min(width, height) < MIN_SIDE or width * height < MIN_PIXELS:
+        return 'too_small'
+    if gray is None:
+        return None
+
+    step = max(1, -(-max(gray.shape) // TRIAGE_SIDE))
+    sample = gray[::step, ::step]
+    edges = _edge_map(sample)
+    # Small text on a large plain image has a low std and edge density overall
+    low_std = sample.std() < MIN_STD
+    if (low_std or edges.mean() < MIN_EDGE_DENSITY) and not has_compact_edges(edges):
+        return 'blank' if low_std else 'low_edge_density'
+    if min_text_score is not None and text_likelihood(edges) < min_text_score:
+        return 'low_text_likelihood'
+    return None
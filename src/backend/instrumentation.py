@@ -0,0 +1,123 @@
+"""
+Lightweight per-document stage timings and counters
+
+A Metrics object is bound to the current context for the duration of one
+document (collect()); pipeline code records into it with stage() and count(),
+which are no-ops when nothing is being collected. Work handed to a thread pool
+through submit() runs in a copy of the submitting context, so tesseract calls
+on pool threads are attributed to the right document and page. Work sent to a
+process pool is only timed from the submitting side.
+
+Timings use the monotonic perf_counter clock. Stages running concurrently on
+several threads each add their own time, so stage totals can exceed wall time.
+"""
+import io
+import time
+import pstats
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+_metrics = contextvars.ContextVar('ocr_metrics', default=None)
+_page = contextvars.ContextVar('ocr_page', default=None)
+
+PROFILE_TOP = 30
+
+
+class Metrics:
+    """Stage timings, per-page timings and counters for one document"""
+
+    def __init__(self):
+        self.stages = {}
+        self.pages = {}
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def add_time(self, name, seconds, page=None):
+        with self._lock:
+            entry = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += seconds
+            entry['calls'] += 1
+            if page is not None:
+                page_stages = self.pages.setdefault(page, {})
+                page_stages[name] = page_stages.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'stages': {name: {'seconds': round(e['seconds'], 4), 'calls': e['calls']}
+                           for name, e in self.stages.items()},
+                'pages': {str(page): {name: round(s, 4) for name, s in stages.items()}
+                          for page, stages in sorted(self.pages.items())},
+                'counters': dict(self.counters)
+            }
+
+
+@contextmanager
+def collect():
+    """Bind a fresh Metrics to the current context and yield it"""
+    metrics = Metrics()
+    token = _metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _metrics.reset(token)
+
+
+@contextmanager
+def stage(name, page=None):
+    """Time the enclosed block as `name` (attributed to the current page by default)"""
+    metrics = _metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(name, time.perf_counter() - start, page if page is not None else _page.get())
+
+
+def count(name, n=1):
+    metrics = _metrics.get()
+    if metrics is not None:
+        metrics.count(name, n)
+
+
+@contextmanager
+def page_scope(page):
+    """Attribute stages in the enclosed block to page"""
+    token = _page.set(page)
+    try:
+        yield
+    finally:
+        _page.reset(token)
+
+
+def _in_page_context(page):
+    ctx = contextvars.copy_context()
+    if page is not None:
+        ctx.run(_page.set, page)
+    return ctx
+
+
+def submit(executor, fn, *args, page=None):
+    """executor.submit(fn, *args) running in a copy of the caller's context, tagged with page"""
+    return executor.submit(_in_page_context(page).run, fn, *args)
+
+
+def run_in_page(page, fn, *args):
+    """Call fn(*args) with stages attributed to page"""
+    return _in_page_context(page).run(fn, *args)
+
+
+def profile_report(profiler, limit=PROFILE_TOP):
+    """Top functions by cumulative time from a cProfile.Profile, as text"""
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,224 @@
+"""
+Bounded priority job queue for the resident OCR worker
+
+A JobQueue runs at most max_concurrent jobs at once on its own threads and
+holds at most max_queued more, ordered by priority class and then arrival.
+A submission beyond that is refused immediately (QueueFull), so an overloaded
+worker answers "busy" at once instead of letting every job slow down together.
+
+Cancellation is cooperative: each job gets a CancelToken, which is cancelled
+by cancel(job_id) or expires at the job's deadline (timeout seconds after it
+was accepted), and the job checks it between units of work - the OCR worker
+checks once per page with drain(). A job cancelled or expired while still
+queued never starts.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter, deque
+
+PRIORITIES = ('high', 'normal', 'low')
+# Recent jobs kept for the wait/run latency percentiles in stats()
+LATENCY_WINDOW = 500
+
+
+class QueueFull(Exception):
+    """Raised by submit() when max_queued jobs are already waiting"""
+
+
+class JobCancelled(Exception):
+    """Raised by CancelToken.check() once the job has been cancelled"""
+
+
+class JobTimedOut(JobCancelled):
+    """Raised by CancelToken.check() once the job's deadline has passed"""
+
+
+class CancelToken:
+    """Cancellation flag and optional monotonic deadline for one job"""
+
+    def __init__(self, timeout=None):
+        self._cancelled = threading.Event()
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raise JobCancelled / JobTimedOut if the job should stop"""
+        if self._cancelled.is_set():
+            raise JobCancelled('Job cancelled')
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise JobTimedOut(f'Job exceeded its {self.timeout:g}s timeout')
+
+
+def drain(generator, token, on_item=None):
+    """Run a streaming generator to completion, checking token before each step
+
+    Returns the generator's return value. On cancellation the generator is
+    closed, so its cleanup (open documents, stage timers) still runs.
+    """
+    try:
+        while True:
+            token.check()
+            try:
+                item = next(generator)
+            except StopIteration as stop:
+                return stop.value
+            if on_item:
+                on_item(item)
+    finally:
+        generator.close()
+
+
+class _Job:
+    __slots__ = ('id', 'priority', 'fn', 'on_finish', 'token', 'submitted', 'started')
+
+    def __init__(self, job_id, priority, fn, on_finish, token):
+        self.id = job_id
+        self.priority = priority
+        self.fn = fn
+        self.on_finish = on_finish
+        self.token = token
+        self.submitted = time.monotonic()
+        self.started = None
+
+
+def _summary(values):
+    if not values:
+        return {'p50': 0, 'p90': 0, 'max': 0}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {'p50': round(pick(0.5), 3), 'p90': round(pick(0.9), 3), 'max': round(values[-1], 3)}
+
+
+class JobQueue:
+    """Priority queue of jobs run on max_concurrent threads
+
+    submit(job_id, fn, priority, timeout, on_finish) queues fn(token);
+    on_finish(status, value) is then called exactly once, with status 'done'
+    (value is fn's result), 'cancelled', 'timeout' or 'error' (value is the
+    exception).
+    """
+
+    def __init__(self, max_concurrent=1, max_queued=16, default_timeout=None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.default_timeout = default_timeout
+        self._heap = []
+        self._queued = {}
+        self._running = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._outcomes = Counter()
+        self._waits = deque(maxlen=LATENCY_WINDOW)
+        self._runs = deque(maxlen=LATENCY_WINDOW)
+        self._threads = [threading.Thread(target=self._work, name=f'ocr-job-{i}', daemon=True)
+                         for i in range(self.max_concurrent)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job_id, fn, priority='normal', timeout=None, on_finish=None):
+        """Queue a job; raises QueueFull when the queue is at capacity"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}, got {priority!r}")
+        with self._cond:
+            if self._closing:
+                raise RuntimeError('Job queue is closed')
+            if job_id in self._queued or job_id in self._running:
+                raise ValueError(f'Job {job_id!r} is already queued or running')
+            # Jobs about to be picked up by an idle thread do not count against max_queued
+            idle = max(0, self.max_concurrent - len(self._running))
+            if len(self._queued) >= self.max_queued + idle:
+                self._outcomes['rejected'] += 1
+                raise QueueFull(f'OCR queue is full ({len(self._queued)} jobs waiting)')
+            job = _Job(job_id, priority, fn, on_finish,
+                       CancelToken(timeout if timeout is not None else self.default_timeout))
+            self._queued[job_id] = job
+            heapq.heappush(self._heap, (PRIORITIES.index(priority), next(self._seq), job))
+            self._cond.notify()
+        return job.token
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; False if it is unknown or already finished"""
+        with self._cond:
+            job = self._queued.pop(job_id, None)
+            if job is None:
+                job = self._running.get(job_id)
+                if job is None:
+                    return False
+                job.token.cancel()
+                return True
+            # Left in the heap and skipped when popped
+            job.token.cancel()
+        self._finish(job, 'cancelled', JobCancelled('Job cancelled'))
+        return True
+
+    def stats(self):
+        """Queue depth, running jobs, outcome counts and recent wait/run latencies (seconds)"""
+        with self._cond:
+            return {
+                'queued': len(self._queued),
+                'running': len(self._running),
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'queued_by_priority': dict(Counter(job.priority for job in self._queued.values())),
+                'outcomes': dict(self._outcomes),
+                'wait_seconds': _summary(self._waits),
+                'run_seconds': _summary(self._runs)
+            }
+
+    def close(self, wait=True):
+        """Stop accepting jobs; queued jobs still run before the threads exit"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                while self._heap:
+                    _, _, job = heapq.heappop(self._heap)
+                    if self._queued.pop(job.id, None) is job:
+                        job.started = time.monotonic()
+                        self._running[job.id] = job
+                        self._waits.append(job.started - job.submitted)
+                        return job
+                if self._closing:
+                    return None
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                job.token.check()
+                status, value = 'done', job.fn(job.token)
+            except JobTimedOut as e:
+                status, value = 'timeout', e
+            except JobCancelled as e:
+                status, value = 'cancelled', e
+            except Exception as e:
+                status, value = 'error', e
+            with self._cond:
+                self._running.pop(job.id, None)
+                self._runs.append(time.monotonic() - job.started)
+            self._finish(job, status, value)
+
+    def _finish(self, job, status, value):
+        with self._cond:
+            self._outcomes[status] += 1
+        if job.on_finish:
+            job.on_finish(status, value)
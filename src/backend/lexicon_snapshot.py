@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Precompiled, memory-mappable lexicon snapshot for fast OCRPipeline startup
+
+Building the dictionaries from the NLTK corpora (words list, Brown frequencies,
+stopwords) plus the spell index takes seconds and hundreds of MB of Python objects
+per process. This module writes them once into a compact binary file of sorted
+string tables and uint32 arrays, which every worker then mmaps read-only: startup
+is near-instant and all workers share the same page-cache pages.
+
+    python lexicon_snapshot.py               # build/refresh the default snapshot
+    python lexicon_snapshot.py --force       # rebuild even if up to date
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import bisect
+import argparse
+import tempfile
+from array import array
+from collections import Counter
+
+from spell_index import SymSpellIndex
+
+SNAPSHOT_MAGIC = b'OCRLEX\x00\x01'
+SNAPSHOT_VERSION = 1
+CORPORA = ('corpora/words', 'corpora/brown', 'corpora/stopwords')
+
+
+def read_nltk_lexicons():
+    """English word list, Brown word frequencies and stopwords straight from NLTK"""
+    from nltk.corpus import brown, words, stopwords
+    english_words = set(words.words())
+    brown_words = [w.lower() for w in brown.words() if w.isalpha()]
+    word_freq = Counter(brown_words)
+    stop_words = set(stopwords.words('english'))
+    return english_words, word_freq, stop_words
+
+
+def corpora_fingerprint():
+    """Cheap identity of the installed NLTK corpora (paths, sizes, mtimes)"""
+    import nltk
+    fingerprint = []
+    for resource in CORPORA:
+        pointer = nltk.data.find(resource)
+        path = getattr(pointer, 'path', None) or pointer.zipfile.filename
+        if os.path.isdir(path):
+            files = sizes = latest = 0
+            for root, _, names in os.walk(path):
+                for name in names:
+                    st = os.stat(os.path.join(root, name))
+                    files += 1
+                    sizes += st.st_size
+                    latest = max(latest, st.st_mtime_ns)
+            fingerprint.append([resource, path, files, sizes, latest])
+        else:
+            st = os.stat(path)
+            fingerprint.append([resource, path, 1, st.st_size, st.st_mtime_ns])
+    return fingerprint
+
+
+class StringTable:
+    """Sorted, immutable string table over a buffer: uint32 offsets + UTF-8 blob
+
+    Supports len(), indexing, iteration and O(log n) membership, so it can stand in
+    for the set/list of words the pipeline used to build in memory.
+    """
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+        self._keys = _KeyView(self)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self.key(i).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, word):
+        return self.find(word) >= 0
+
+    def key(self, i):
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def find(self, word):
+        """Position of word in the table, or -1"""
+        if not isinstance(word, str):
+            return -1
+        key = word.encode('utf-8')
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self) and self.key(i) == key:
+            return i
+        return -1
+
+
+class _KeyView:
+    """Sequence of raw keys so bisect can search a StringTable"""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table)
+
+    def __getitem__(self, i):
+        return self._table.key(i)
+
+
+class FrequencyTable:
+    """Read-only word -> count mapping backed by a StringTable and a uint32 array"""
+
+    def __init__(self, keys, counts):
+        self._keys = keys
+        self._counts = counts
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, word):
+        return word in self._keys
+
+    def get(self, word, default=None):
+        i = self._keys.find(word)
+        return self._counts[i] if i >= 0 else default
+
+
+class PostingTable:
+    """Read-only delete variant -> word ids mapping for SymSpellIndex"""
+
+    def __init__(self, keys, offsets, ids):
+        self._keys = keys
+        self._offsets = offsets
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, key, default=None):
+        i = self._keys.find(key)
+        if i < 0:
+            return default
+        return self._ids[self._offsets[i]:self._offsets[i + 1]]
+
+
+class LexiconSnapshot:
+    """Memory-mapped lexicons: english_words, word_freq, stop_words and spell_index"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+
+        if bytes(buf[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a lexicon snapshot: {path}")
+        (header_len,) = struct.unpack_from('<I', buf, len(SNAPSHOT_MAGIC))
+        header_start = len(SNAPSHOT_MAGIC) + 4
+        self.header = json.loads(bytes(buf[header_start:header_start + header_len]))
+        if self.header.get('version') != SNAPSHOT_VERSION or self.header.get('byteorder') != sys.byteorder:
+            raise ValueError(f"Incompatible lexicon snapshot: {path}")
+
+        sections = self.header['sections']
+
+        def uint32s(name):
+            start, length = sections[name]
+            return buf[start:start + length].cast('I')
+
+        def raw(name):
+            start, length = sections[name]
+            return buf[start:start + length]
+
+        words = StringTable(uint32s('words.offsets'), raw('words.blob'))
+        freq_keys = StringTable(uint32s('freq.offsets'), raw('freq.blob'))
+        stops = StringTable(uint32s('stop.offsets'), raw('stop.blob'))
+        delete_keys = StringTable(uint32s('deletes.offsets'), raw('deletes.blob'))
+
+        self.english_words = words
+        self.word_freq = FrequencyTable(freq_keys, uint32s('freq.counts'))
+        self.stop_words = set(stops)
+        self.spell_index = SymSpellIndex.from_tables(
+            words,
+            uint32s('index.freqs'),
+            PostingTable(delete_keys, uint32s('deletes.posting_offsets'), uint32s('deletes.ids')),
+            max_distance=self.header['max_distance'],
+            prefix_length=self.header['prefix_length']
+        )
+
+    @property
+    def fingerprint(self):
+        return self.header.get('fingerprint')
+
+    @classmethod
+    def open_or_build(cls, path, max_distance=2, prefix_length=7):
+        """Open the snapshot at path, rebuilding it first if missing or out of date"""
+        fingerprint = corpora_fingerprint()
+        try:
+            snapshot = cls(path)
+            if (snapshot.fingerprint == fingerprint
+                    and snapshot.header['max_distance'] == max_distance
+                    and snapshot.header['prefix_length'] == prefix_length):
+                return snapshot
+        except (OSError, ValueError, KeyError):
+            pass
+
+        build_snapshot(path, max_distance=max_distance, prefix_length=prefix_length,
+                       fingerprint=fingerprint)
+        return cls(path)
+
+
+def _string_table_sections(prefix, strings):
+    """Offsets and blob sections for a sorted list of strings"""
+    offsets = array('I', [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode('utf-8')
+        offsets.append(len(blob))
+    return [(f'{prefix}.offsets', offsets.tobytes()), (f'{prefix}.blob', bytes(blob))]
+
+
+def build_snapshot(path, max_distance=2, prefix_length=7, fingerprint=None):
+    """Read the NLTK corpora, build the spell index and write an atomic snapshot to path"""
+    english_words, word_freq, stop_words = read_nltk_lexicons()
+    index = SymSpellIndex(english_words, word_freq, max_distance=max_distance,
+                          prefix_length=prefix_length)
+
+    freq_words = sorted(word_freq)
+    delete_keys = sorted(index.deletes)
+    posting_offsets = array('I', [0])
+    posting_ids = array('I')
+    for key in delete_keys:
+        posting = index.deletes[key]
+        if type(posting) is int:
+            posting_ids.append(posting)
+        else:
+            posting_ids.extend(posting)
+        posting_offsets.append(len(posting_ids))
+
+    sections = (
+        _string_table_sections('words', index.words)
+        + [('index.freqs', array('I', index.freqs).tobytes())]
+        + _string_table_sections('freq', freq_words)
+        + [('freq.counts', array('I', (word_freq[w] for w in freq_words)).tobytes())]
+        + _string_table_sections('stop', sorted(stop_words))
+        + _string_table_sections('deletes', delete_keys)
+        + [('deletes.posting_offsets', posting_offsets.tobytes()),
+           ('deletes.ids', posting_ids.tobytes())]
+    )
+
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'byteorder': sys.byteorder,
+        'fingerprint': fingerprint if fingerprint is not None else corpora_fingerprint(),
+        'max_distance': max_distance,
+        'prefix_length': prefix_length,
+        'sections': {}
+    }
+    # Section offsets live in the header, so size the header with placeholder offsets
+    # first; 8-byte alignment keeps the uint32 arrays castable in place.
+    def layout(header_len):
+        position = len(SNAPSHOT_MAGIC) + 4 + header_len
+        for name, data in sections:
+            position += -position % 8
+            header['sections'][name] = [position, len(data)]
+            position += len(data)
+        return json.dumps(header).encode('utf-8')
+
+    header_bytes = layout(0)
+    while True:
+        padded_len = len(header_bytes) + 64
+        header_bytes = layout(padded_len)
+        if len(header_bytes) <= padded_len:
+            header_bytes = header_bytes.ljust(padded_len)
+            break
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            for name, data in sections:
+                f.write(b'\0' * (header['sections'][name][0] - f.tell()))
+                f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def main():
+    from ocr_wrapper import DEFAULT_LEXICON_SNAPSHOT
+    parser = argparse.ArgumentParser(description='Build the OCR lexicon snapshot')
+    parser.add_argument('--output', default=DEFAULT_LEXICON_SNAPSHOT, help='Snapshot file to write')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the snapshot is current')
+    args = parser.parse_args()
+
+    if args.force:
+        build_snapshot(args.output)
+        snapshot = LexiconSnapshot(args.output)
+    else:
+        snapshot = LexiconSnapshot.open_or_build(args.output)
+    print(json.dumps({
+        'path': args.output,
+        'size_bytes': os.path.getsize(args.output),
+        'english_words': len(snapshot.english_words),
+        'word_freq': len(snapshot.word_freq),
+        'stop_words': len(snapshot.stop_words),
+        'index_keys': len(snapshot.spell_index.deletes)
+    }))
+
+
+if __name__ == '__main__':
+    main()
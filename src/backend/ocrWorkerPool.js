@@ -0,0 +1,226 @@
+// Pool of resident Python OCR workers (ocr_wrapper.py --serve)
+//
+// Each worker builds the OCR pipeline once and then processes jobs sent as
+// JSON lines on stdin, answering with one JSON line per job on stdout. Jobs
+// are queued inside the worker (maxJobs at once, queueSize waiting); a worker
+// with a full queue answers at once with status "busy".
+import { spawn } from "child_process";
+import readline from "readline";
+
+const RESPAWN_DELAY_MS = 1000;
+
+export class OcrWorkerPool {
+	constructor({
+		size = 2,
+		cwd,
+		command = "uv",
+		args = ["run", "python", "ocr_wrapper.py", "--serve"],
+		maxJobs = 1,
+		queueSize = 8,
+		jobTimeout = null,
+	} = {}) {
+		this.size = size;
+		this.cwd = cwd;
+		this.command = command;
+		this.args = [
+			...args,
+			"--max-jobs",
+			String(maxJobs),
+			"--queue-size",
+			String(queueSize),
+		];
+		if (jobTimeout) this.args.push("--job-timeout", String(jobTimeout));
+		this.workers = [];
+		this.jobWorkers = new Map();
+		this.nextJobId = 1;
+		this.nextControlId = 1;
+		this.closing = false;
+	}
+
+	start() {
+		for (let slot = 0; slot < this.size; slot++) {
+			this.workers[slot] = this._spawnWorker(slot);
+		}
+		return this;
+	}
+
+	_spawnWorker(slot) {
+		const proc = spawn(this.command, this.args, {
+			cwd: this.cwd,
+			stdio: ["pipe", "pipe", "pipe"],
+		});
+		const worker = { slot, proc, alive: true, ready: false, pending: new Map() };
+
+		readline
+			.createInterface({ input: proc.stdout })
+			.on("line", (line) => this._handleLine(worker, line));
+
+		proc.stderr.on("data", (data) => {
+			console.error(`🐍 [ocr worker ${slot}] ${data.toString().trimEnd()}`);
+		});
+
+		// Writes racing the worker's exit fail with EPIPE; the close handler
+		// rejects the jobs they carried
+		proc.stdin.on("error", (error) => {
+			console.warn(`⚠️ OCR worker ${slot} stdin: ${error.message}`);
+		});
+
+		proc.on("error", (error) => {
+			console.error(`❌ Failed to start OCR worker ${slot}:`, error);
+			worker.alive = false;
+		});
+
+		proc.on("exit", () => {
+			// Stop routing jobs here as soon as the process is gone
+			worker.alive = false;
+		});
+
+		proc.on("close", (code) => {
+			console.warn(`⚠️ OCR worker ${slot} exited with code: ${code}`);
+			worker.alive = false;
+			if (this.workers[slot] === worker) this.workers[slot] = null;
+			for (const [id, { reject }] of worker.pending) {
+				this.jobWorkers.delete(id);
+				reject(new Error(`OCR worker exited with code ${code}`));
+			}
+			worker.pending.clear();
+
+			if (!this.closing) {
+				setTimeout(() => {
+					this.workers[slot] = this._spawnWorker(slot);
+				}, RESPAWN_DELAY_MS);
+			}
+		});
+
+		return worker;
+	}
+
+	_handleLine(worker, line) {
+		let message;
+		try {
+			message = JSON.parse(line);
+		} catch (err) {
+			console.warn(`⚠️ Ignoring non-JSON output from OCR worker: ${line}`);
+			return;
+		}
+
+		if (message.event === "ready") {
+			worker.ready = true;
+			console.log(`🐍 OCR worker ${worker.slot} ready (pid ${message.pid})`);
+			return;
+		}
+
+		const job = worker.pending.get(message.id);
+		if (!job) {
+			console.warn(`⚠️ Response for unknown OCR job: ${message.id}`);
+			return;
+		}
+
+		const { id, event, ...response } = message;
+		if (event === "progress") {
+			if (job.onProgress) job.onProgress(response);
+			return;
+		}
+
+		worker.pending.delete(id);
+		this.jobWorkers.delete(id);
+		job.resolve(response);
+	}
+
+	_pickWorker() {
+		// Prefer ready workers, then the one with the fewest jobs in flight
+		const alive = this.workers.filter((w) => w && w.alive);
+		alive.sort(
+			(a, b) => b.ready - a.ready || a.pending.size - b.pending.size
+		);
+		return alive[0];
+	}
+
+	_send(worker, message, onProgress = null) {
+		return new Promise((resolve, reject) => {
+			if (!worker.alive || !worker.proc.stdin.writable) {
+				reject(new Error(`OCR worker ${worker.slot} is not running`));
+				return;
+			}
+			worker.pending.set(message.id, { resolve, reject, onProgress });
+			worker.proc.stdin.write(JSON.stringify(message) + "\n");
+		});
+	}
+
+	// onProgress, when given, receives a record per processed page;
+	// cacheMode is "use", "refresh" or "bypass" for the result cache;
+	// profile attaches a cProfile summary to the result metadata;
+	// jobId names the job for cancel(); priority ("high", "normal", "low")
+	// and timeout (seconds) override the worker's defaults.
+	// Resolves with the worker's response, whose status is "busy",
+	// "cancelled" or "timeout" when the job did not complete.
+	run(
+		filePath,
+		{
+			userId = null,
+			onProgress = null,
+			cacheMode = "use",
+			profile = false,
+			jobId = null,
+			priority = null,
+			timeout = null,
+		} = {}
+	) {
+		const worker = this._pickWorker();
+		if (!worker) {
+			return Promise.reject(new Error("No OCR workers available"));
+		}
+
+		const id = jobId ? String(jobId) : String(this.nextJobId++);
+		this.jobWorkers.set(id, worker);
+		const message = {
+			id,
+			file_path: filePath,
+			user_id: userId,
+			stream: Boolean(onProgress),
+			cache: cacheMode,
+			profile: Boolean(profile),
+		};
+		if (priority) message.priority = priority;
+		if (timeout) message.timeout = timeout;
+		return this._send(worker, message, onProgress);
+	}
+
+	// Cancel a queued or running job; resolves with whether it was found
+	async cancel(jobId) {
+		const worker = this.jobWorkers.get(String(jobId));
+		if (!worker) return false;
+		const response = await this._send(worker, {
+			op: "cancel",
+			id: `ctl-${this.nextControlId++}`,
+			job_id: String(jobId),
+		});
+		return Boolean(response.cancelled);
+	}
+
+	// Queue depth, outcomes and latencies of every live worker
+	async stats() {
+		const alive = this.workers.filter((w) => w && w.alive && w.ready);
+		const workers = await Promise.all(
+			alive.map(async (worker) => {
+				const response = await this._send(worker, {
+					op: "stats",
+					id: `ctl-${this.nextControlId++}`,
+				});
+				return { slot: worker.slot, pid: worker.proc.pid, ...response.stats };
+			})
+		);
+		return {
+			workers,
+			queued: workers.reduce((sum, w) => sum + w.queued, 0),
+			running: workers.reduce((sum, w) => sum + w.running, 0),
+		};
+	}
+
+	close() {
+		this.closing = true;
+		for (const worker of this.workers) {
+			if (worker) worker.proc.stdin.end();
+		}
+	}
+}
@@ -0,0 +1,133 @@
+"""
+OCR engines: pooled in-process tesseract, with pytesseract as the fallback
+
+pytesseract runs every image through a fresh `tesseract` process: the image is
+written to a temporary file, the process starts and loads the traineddata, and
+the result is read back from disk. For documents with many small images that
+fixed cost outweighs the recognition itself.
+
+TesserocrEngine keeps up to pool_size initialised tesseract engines
+(tesserocr.PyTessBaseAPI) alive for the life of the pipeline and hands them
+the grayscale buffer in memory. Each engine is used by one thread at a time,
+and tesserocr releases the GIL while recognising, so the image thread pool
+still runs in parallel. tesserocr is optional: without it (or if its engines
+cannot be initialised) the pipeline uses PytesseractEngine.
+
+Both engines return word-level data shaped like pytesseract.image_to_data's
+DICT output (text, conf, block_num, par_num, line_num), which OCRText reads.
+"""
+import queue
+import threading
+
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+TESSERACT_LANG = 'eng'
+# Assume a single uniform block of text; default (LSTM) engine
+TESSERACT_PSM = 6
+TESSERACT_OEM = 3
+TESSERACT_CONFIG = f'--oem {TESSERACT_OEM} --psm {TESSERACT_PSM} -l {TESSERACT_LANG}'
+
+ENGINES = ('auto', 'tesserocr', 'pytesseract')
+TESSEROCR_AVAILABLE = tesserocr is not None
+
+
+class PytesseractEngine:
+    """One tesseract subprocess per image (via temporary files)"""
+    name = 'pytesseract'
+
+    def image_to_data(self, gray):
+        return pytesseract.image_to_data(gray, config=TESSERACT_CONFIG,
+                                         output_type=pytesseract.Output.DICT)
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    """A pool of resident tesseract engines fed in-memory grayscale buffers"""
+    name = 'tesserocr'
+
+    def __init__(self, pool_size=1, lang=TESSERACT_LANG, psm=TESSERACT_PSM, oem=TESSERACT_OEM):
+        if not TESSEROCR_AVAILABLE:
+            raise RuntimeError('tesserocr is not installed')
+        self.pool_size = max(1, pool_size)
+        self._options = {'lang': lang, 'psm': psm, 'oem': oem}
+        self._idle = queue.LifoQueue()
+        self._engines = []
+        self._lock = threading.Lock()
+        # Fail now, not on the first image, when the traineddata cannot be loaded
+        self._idle.put(self._new_engine())
+
+    def _new_engine(self):
+        api = tesserocr.PyTessBaseAPI(**self._options)
+        self._engines.append(api)
+        return api
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._engines) < self.pool_size:
+                return self._new_engine()
+        return self._idle.get()
+
+    def image_to_data(self, gray):
+        height, width = gray.shape
+        api = self._acquire()
+        try:
+            api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+            api.Recognize()
+            return _word_data(api)
+        finally:
+            api.Clear()
+            self._idle.put(api)
+
+    def close(self):
+        with self._lock:
+            engines, self._engines = self._engines, []
+        for api in engines:
+            api.End()
+
+
+def _word_data(api):
+    """Recognised words of api as an image_to_data-style dict"""
+    data = {'text': [], 'conf': [], 'block_num': [], 'par_num': [], 'line_num': []}
+    level = tesserocr.RIL.WORD
+    block = par = line = 0
+    iterator = api.GetIterator()
+    if iterator is None:
+        return data
+    for word in tesserocr.iterate_level(iterator, level):
+        if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+            block, par, line = block + 1, 0, 0
+        if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+            par, line = par + 1, 0
+        if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+            line += 1
+        data['text'].append(word.GetUTF8Text(level) or '')
+        data['conf'].append(word.Confidence(level))
+        data['block_num'].append(block)
+        data['par_num'].append(par)
+        data['line_num'].append(line)
+    return data
+
+
+def create_engine(name='auto', pool_size=1):
+    """The requested engine; 'auto' prefers tesserocr and falls back to pytesseract"""
+    if name not in ENGINES:
+        raise ValueError(f"OCR engine must be one of {ENGINES}, got {name!r}")
+    if name == 'pytesseract':
+        return PytesseractEngine()
+    try:
+        return TesserocrEngine(pool_size)
+    except Exception:
+        if name == 'tesserocr':
+            raise
+        return PytesseractEngine()
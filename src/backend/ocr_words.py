@@ -0,0 +1,86 @@
+"""
+Word-level tesseract output: text layout and per-token confidences
+
+pytesseract.image_to_data reports every recognised word with its layout
+position (block, paragraph, line) and a 0-100 confidence. OCRText rebuilds the
+plain text from those words (lines joined by newlines, paragraphs by blank
+lines, like image_to_string) and remembers each word's character span, so the
+tokens NLTK later splits the text into can be mapped back to the confidence of
+the word they came from.
+"""
+from bisect import bisect_right
+
+
+class OCRText:
+    """Text rebuilt from tesseract words, with each word's span and confidence"""
+    __slots__ = ('text', 'starts', 'ends', 'confidences')
+
+    def __init__(self, text='', starts=(), ends=(), confidences=()):
+        self.text = text
+        self.starts = list(starts)
+        self.ends = list(ends)
+        self.confidences = list(confidences)
+
+    @classmethod
+    def from_data(cls, data):
+        """Build from an image_to_data(..., output_type=Output.DICT) result"""
+        parts = []
+        starts, ends, confidences = [], [], []
+        length = 0
+        last_par = last_line = None
+        for i, word in enumerate(data['text']):
+            word = (word or '').strip()
+            conf = float(data['conf'][i])
+            if not word or conf < 0:
+                continue
+            par = (data['block_num'][i], data['par_num'][i])
+            line = par + (data['line_num'][i],)
+            if last_line is not None:
+                sep = ' ' if line == last_line else '\n' if par == last_par else '\n\n'
+                parts.append(sep)
+                length += len(sep)
+            last_par, last_line = par, line
+            starts.append(length)
+            parts.append(word)
+            length += len(word)
+            ends.append(length)
+            confidences.append(conf)
+        return cls(''.join(parts), starts, ends, confidences)
+
+    def __len__(self):
+        return len(self.confidences)
+
+    def mean_confidence(self):
+        """Mean word confidence on a 0-1 scale, or None without words"""
+        if not self.confidences:
+            return None
+        return sum(self.confidences) / len(self.confidences) / 100
+
+    def confidence_at(self, offset):
+        """Confidence of the word covering character offset, or None"""
+        i = bisect_right(self.starts, offset) - 1
+        if i >= 0 and offset < self.ends[i]:
+            return self.confidences[i]
+        return None
+
+    def token_confidences(self, sentences):
+        """Confidence of each token of annotated sentences, aligned by position in text
+
+        Tokens are located left to right; a token the tokenizer rewrote (e.g.
+        quotes turned into `` and '') cannot be found next in the text and gets
+        None, as does anything outside a recognised word.
+        """
+        text = self.text
+        cursor = 0
+        result = []
+        for _, tagged in sentences:
+            confs = []
+            for token, _ in tagged:
+                offset = text.find(token, cursor)
+                if offset < 0 or text[cursor:offset].strip():
+                    confs.append(None)
+                    continue
+                cursor = offset + len(token)
+                confs.append(self.confidence_at(offset))
+            result.append(confs)
+        return result
@@ -4,18 +4,18 @@ Complete OCR Pipeline - Self-contained in src/backend
 """
 import sys
 import os
+import argparse
 import json
-import io
-import re
 import string
-import tempfile
-from datetime import datetime
-from collections import Counter
+import time
+import cProfile
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
 import hashlib
 
 # Core dependencies
 required_imports = [
-    ("pdfplumber", "pdfplumber"),
     ("fitz", "PyMuPDF"),
     ("pytesseract", "pytesseract"),
     ("cv2", "opencv-python"),
@@ -28,7 +28,7 @@ for mod_name, pip_name in required_imports:
     try:
         if mod_name == "PIL":
             import PIL
-            from PIL import Image, ImageEnhance
+            from PIL import Image
         else:
             __import__(mod_name)
     except ImportError:
@@ -44,18 +44,98 @@ if missing:
         )
     }))
     sys.exit(1)
-import pdfplumber
 import fitz
-import pytesseract
-import cv2
-import numpy as np
-from PIL import Image, ImageEnhance
 import nltk
+from edit_distance import levenshtein
+from spell_index import SymSpellIndex
+from correction_cache import CorrectionCache
+from lexicon_snapshot import LexiconSnapshot, read_nltk_lexicons
+from result_cache import ResultCache, file_digest, config_key
+from image_triage import triage_image
+from page_router import route_page, NATIVE, IMAGE_OCR, PAGE_RENDER, RENDER_DPI
+import instrumentation
+from annotated_text import AnnotatedText, Annotator
+from correction_rules import CorrectionRules
+from content_analyzer import ContentAnalyzer
+from job_queue import JobQueue, QueueFull, drain
+from ocr_words import OCRText
+from ocr_engine import create_engine, PytesseractEngine, ENGINES, TESSERACT_CONFIG, TESSEROCR_AVAILABLE
+from preprocess import image_info, decode_grayscale, normalize_resolution, enhance_contrast, sharpen
 DEPS_AVAILABLE = True
+
+# Runtime settings
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('OCR_CACHE_DIR', os.path.join(BACKEND_DIR, 'cache'))
+DEFAULT_CORRECTION_CACHE = os.path.join(CACHE_DIR, 'corrections.json')
+DEFAULT_LEXICON_SNAPSHOT = os.path.join(CACHE_DIR, 'lexicon.snapshot')
+DEFAULT_RESULT_CACHE_DIR = os.path.join(CACHE_DIR, 'results')
+EXECUTOR_MODES = ('sequential', 'thread', 'process')
+CACHE_MODES = ('use', 'refresh', 'bypass')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+SUPPORTED_EXTENSIONS = ('.pdf',) + IMAGE_EXTENSIONS
+# PDFs longer than this are queued behind other jobs by default
+LONG_DOCUMENT_PAGES = 50
+# Tesseract word confidence (0-100) at or above which dictionary words skip correction
+DEFAULT_CONFIDENCE_THRESHOLD = 90
+
+# Bump whenever a change alters pipeline output, so cached results are not reused
+PIPELINE_VERSION = '8'
+
 class OCRPipeline:
-    def __init__(self):
+    def __init__(self, correction_cache_size=50000, correction_cache_path=None,
+                 lexicon_snapshot_path=None, executor_mode='sequential', max_workers=None,
+                 max_concurrency=None, result_cache_dir=None,
+                 result_cache_max_bytes=512 * 1024 * 1024, image_triage=True,
+                 min_text_score=None, nltk_download=True,
+                 confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD, page_routing=True,
+                 render_dpi=RENDER_DPI, ocr_engine='auto'):
+        if executor_mode not in EXECUTOR_MODES:
+            raise ValueError(f"executor_mode must be one of {EXECUTOR_MODES}, got {executor_mode!r}")
+        self.lexicon_snapshot_path = lexicon_snapshot_path
+        self.lexicon_snapshot = None
+        self.nltk_download = nltk_download
         self.setup_nltk()
         self.english_words, self.word_freq, self.stop_words = self.create_dict()
+        self.spell_index = self.build_spell_index()
+        self.annotator = Annotator()
+        self.correction_rules = CorrectionRules()
+        self.correction_cache = CorrectionCache(correction_cache_size, correction_cache_path)
+        self.result_cache = ResultCache(result_cache_dir, result_cache_max_bytes) if result_cache_dir else None
+        self.image_triage = image_triage
+        self.min_text_score = min_text_score
+        self.confidence_threshold = confidence_threshold
+        self.page_routing = page_routing
+        self.render_dpi = render_dpi
+        
+        # OCR engine: resident in-process tesseract engines when tesserocr is
+        # available ('auto'), otherwise a tesseract subprocess per image. Created
+        # on first use, so correction worker processes never load traineddata.
+        if ocr_engine not in ENGINES:
+            raise ValueError(f"ocr_engine must be one of {ENGINES}, got {ocr_engine!r}")
+        if ocr_engine == 'tesserocr' and not TESSEROCR_AVAILABLE:
+            raise ValueError("ocr_engine 'tesserocr' requires the tesserocr package (pip install tesserocr)")
+        self.ocr_engine_name = ocr_engine
+        self._ocr_engine = None
+        self._fallback_engine = PytesseractEngine()
+        self._engine_lock = threading.Lock()
+        
+        # Image OCR concurrency: a thread pool shared by all documents runs the
+        # tesseract calls; in 'process' mode the CPU-bound correction is handed on
+        # to a process pool. max_concurrency caps the images in flight per document.
+        self.executor_mode = executor_mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = min(max_concurrency or self.max_workers, self.max_workers)
+        self._thread_pool = None
+        self._process_pool = None
+        # Correction workers start from the persisted cache; what they learn comes
+        # back with each result and is saved by this pipeline
+        self._worker_options = {
+            'correction_cache_size': correction_cache_size,
+            'correction_cache_path': correction_cache_path,
+            'lexicon_snapshot_path': lexicon_snapshot_path,
+            'nltk_download': nltk_download,
+            'confidence_threshold': confidence_threshold
+        }
         
     def setup_nltk(self):
         """Setup NLTK with quiet initialization"""
@@ -74,8 +154,10 @@ class OCRPipeline:
                 except LookupError:
                     missing.append(data)
             
-            for data in missing:
-                nltk.download(data, download_dir=nltk_data_path, quiet=True)
+            # Offline runs (benchmarks, air-gapped hosts) use whatever is installed
+            if self.nltk_download:
+                for data in missing:
+                    nltk.download(data, download_dir=nltk_data_path, quiet=True)
                 
             self.nltk_available = True
         except Exception as e:
@@ -87,256 +169,455 @@ class OCRPipeline:
             if not self.nltk_available:
                 return set(), Counter(), set()
             
-            from nltk.corpus import brown, words, stopwords
-            english_words = set(words.words())
-            brown_words = [w.lower() for w in brown.words() if w.isalpha()]
-            word_freq = Counter(brown_words)
-            stop_words = set(stopwords.words('english'))
-            return english_words, word_freq, stop_words
+            # Memory-mapped snapshot (rebuilt when the NLTK corpora change)
+            if self.lexicon_snapshot_path:
+                try:
+                    self.lexicon_snapshot = LexiconSnapshot.open_or_build(self.lexicon_snapshot_path)
+                    snapshot = self.lexicon_snapshot
+                    return snapshot.english_words, snapshot.word_freq, snapshot.stop_words
+                except Exception:
+                    self.lexicon_snapshot = None
+            
+            return read_nltk_lexicons()
         except:
             return set(), Counter(), set()
     
-    def edit_distance(self, s1, s2):
-        """Calculate edit distance between strings"""
-        if len(s1) < len(s2): 
-            return self.edit_distance(s2, s1)
-        if not s2: 
-            return len(s1)
-        
-        prev = list(range(len(s2) + 1))
-        for i, c1 in enumerate(s1):
-            curr = [i + 1]
-            for j, c2 in enumerate(s2):
-                ins, dele, sub = prev[j+1]+1, curr[j]+1, prev[j]+(c1!=c2)
-                curr.append(min(ins, dele, sub))
-            prev = curr
-        return prev[-1]
+    def build_spell_index(self):
+        """Build the symmetric-delete candidate index used by spell_check"""
+        if not self.english_words:
+            return None
+        if self.lexicon_snapshot:
+            return self.lexicon_snapshot.spell_index
+        return SymSpellIndex(self.english_words, self.word_freq, max_distance=2)
+    
+    def edit_distance(self, s1, s2, max_d=None):
+        """Calculate edit distance between strings (capped at max_d + 1 when max_d is given)"""
+        return levenshtein(s1, s2, max_d)
     
     def spell_check(self, word, max_d=2):
         """Spell check using edit distance and frequency"""
         word = word.lower()
+        instrumentation.count('tokens_spell_checked')
         if not self.english_words or word in self.english_words:
             return word
         
-        candidates = []
-        for w in self.english_words:
-            if abs(len(w) - len(word)) <= max_d:
-                dist = self.edit_distance(word, w)
-                if dist <= max_d:
-                    candidates.append((w, dist, self.word_freq.get(w, 1)))
+        corrected = self.correction_cache.get(word, max_d)
+        if corrected is None:
+            instrumentation.count('spell_index_lookups')
+            corrected = self.spell_index.lookup(word, max_d) or word
+            self.correction_cache.put(word, max_d, corrected)
+        return corrected
+    
+    def cache_config(self):
+        """Settings that change pipeline output; part of every result cache key"""
+        return {
+            "pipeline_version": PIPELINE_VERSION,
+            "nltk_available": self.nltk_available,
+            "lexicon_size": len(self.english_words),
+            "tesseract_config": TESSERACT_CONFIG,
+            "image_triage": self.image_triage,
+            "min_text_score": self.min_text_score,
+            "confidence_threshold": self.confidence_threshold,
+            "page_routing": self.page_routing,
+            "render_dpi": self.render_dpi,
+            # The backend actually in use: 'auto' differs by install, and tesserocr
+            # links its own libtesseract
+            "ocr_engine": self._get_ocr_engine().name
+        }
+    
+    def save_caches(self):
+        """Persist warm caches so a restarted worker does not start cold"""
+        self.correction_cache.save()
+    
+    def close(self):
+        """Shut down worker pools and OCR engines"""
+        for pool in (self._thread_pool, self._process_pool):
+            if pool:
+                pool.shutdown(wait=True)
+        self._thread_pool = self._process_pool = None
+        if self._ocr_engine:
+            self._ocr_engine.close()
+            self._ocr_engine = None
+    
+    def _get_thread_pool(self):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix='ocr')
+        return self._thread_pool
+    
+    def _get_ocr_engine(self):
+        if self._ocr_engine is None:
+            with self._engine_lock:
+                if self._ocr_engine is None:
+                    # One engine per thread that can be running tesseract at once
+                    self._ocr_engine = create_engine(self.ocr_engine_name, self.max_workers)
+        return self._ocr_engine
+    
+    def _get_process_pool(self):
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     initializer=_init_correction_worker,
+                                                     initargs=(self._worker_options,))
+        return self._process_pool
+    
+    def _ocr_pages(self, pages, stats):
+        """Run image OCR over a page stream, yielding (page, image results) in page order
+        
+        Images are dispatched as soon as their page is read, so up to max_concurrency
+        images (across pages) are OCR'd at once while earlier pages are still being
+        consumed; a page is yielded as soon as it and every page before it are done.
+        Image bytes are released once submitted. An image that repeats
+        within the document (same xref, or same extracted bytes under another xref,
+        e.g. a logo on every slide) is OCR'd once and its result reused; only what a
+        repeat needs is kept (no annotations), so memory does not grow with the
+        document. Rendered pages (no xref) are never memoised.
+        """
+        sequential = self.executor_mode == 'sequential'
+        executor = None if sequential else self._get_thread_pool()
+        seen = {}  # xref / content digest -> memoised result, or future while running
+        pending = deque()
+        in_flight = 0
         
-        if candidates:
-            return sorted(candidates, key=lambda x: (x[1], -x[2]))[0][0]
-        return word
+        try:
+            for page in pages:
+                jobs = []
+                keys = []  # memo keys of the images first OCR'd on this page
+                submitted = 0
+                for img in page['images']:
+                    image_bytes = img.pop('bytes')
+                    memoise = img['xref'] is not None
+                    job = seen.get(img['xref'], _MISSING) if memoise else _MISSING
+                    digest = None
+                    if job is _MISSING and memoise:
+                        digest = hashlib.sha256(image_bytes).hexdigest()
+                        job = seen.get(digest, _MISSING)
+                    
+                    fresh = job is _MISSING
+                    if not fresh:
+                        stats['duplicate_images_skipped'] += 1
+                        if not sequential and not isinstance(job, Future):
+                            job = _completed(job)
+                    elif sequential:
+                        job = instrumentation.run_in_page(page['page'], self._ocr_image_bytes, image_bytes)
+                    else:
+                        job = instrumentation.submit(executor, self._ocr_image_bytes, image_bytes,
+                                                     page=page['page'])
+                        submitted += 1
+                    
+                    if memoise and fresh:
+                        memo = _memo_entry(job) if sequential else job
+                        seen[img['xref']] = memo
+                        if digest:
+                            seen[digest] = memo
+                        if not sequential:
+                            keys.extend(key for key in (img['xref'], digest) if key)
+                    jobs.append(job)
+                
+                if sequential:
+                    yield page, jobs
+                    continue
+                
+                pending.append((page, jobs, submitted, keys))
+                in_flight += submitted
+                # Yield every leading page whose images are done (pages without images
+                # are done at once); block on the oldest only at the concurrency cap
+                while pending and (in_flight >= self.max_concurrency or
+                                   all(f.done() for f in pending[0][1])):
+                    done_page, done_jobs, done_submitted, done_keys = pending.popleft()
+                    in_flight -= done_submitted
+                    yield done_page, _page_results(done_jobs, done_keys, seen)
+            while pending:
+                done_page, done_jobs, _, done_keys = pending.popleft()
+                yield done_page, _page_results(done_jobs, done_keys, seen)
+        finally:
+            if not sequential:
+                # Closed early (job cancelled or timed out): drop OCR not yet started
+                for _, jobs, _, _ in pending:
+                    for job in jobs:
+                        job.cancel()
+    
+    def _correct_ocr_block(self, ocr_text):
+        """(AnnotatedText, per-rule hits) for an OCRText, run in the process pool when configured"""
+        with instrumentation.stage('correct_text'):
+            if self.executor_mode == 'process':
+                corrected, hits, cache_updates = self._get_process_pool().submit(
+                    _correct_text_in_worker, ocr_text).result()
+                self.correction_cache.merge(*cache_updates)
+                return corrected, hits
+            hits = Counter()
+            return self.correct_annotated(ocr_text.text, hits, ocr_text), hits
+    
+    def _prepare_image(self, source):
+        """Decode image bytes or a path into one enhanced grayscale buffer for tesseract"""
+        with instrumentation.stage('decode'):
+            gray = normalize_resolution(decode_grayscale(source), image_info(source)[2])
+        with instrumentation.stage('enhance'):
+            return sharpen(enhance_contrast(gray))
+    
+    def _tesseract(self, gray):
+        """Word-level OCR of a grayscale buffer, as an OCRText
+        
+        Timed per backend, as the stage 'tesseract:<engine name>'.
+        """
+        engine = self._get_ocr_engine()
+        instrumentation.count('tesseract_calls')
+        try:
+            with instrumentation.stage(f'tesseract:{engine.name}'):
+                data = engine.image_to_data(gray)
+        except Exception:
+            if engine.name == self._fallback_engine.name:
+                raise
+            # An image the in-process engine fails on still gets a subprocess run
+            instrumentation.count('ocr_engine_fallbacks')
+            with instrumentation.stage(f'tesseract:{self._fallback_engine.name}'):
+                data = self._fallback_engine.image_to_data(gray)
+        return OCRText.from_data(data)
+    
+    def _triage(self, width, height, gray=None):
+        """Reason to skip OCR on an embedded image, or None to OCR it"""
+        if not self.image_triage:
+            return None
+        return triage_image(width, height, gray, self.min_text_score)
+    
+    def _ocr_image_bytes(self, image_bytes):
+        """OCR and correct one embedded image
+        
+        Returns {"raw_content", "corrected_content", "annotations", "corrections",
+        "confidence"}, {"skipped": reason} when triage rejects the image, or None on
+        failure. confidence is the mean tesseract word confidence (0-1).
+        """
+        try:
+            # Size checks need only the header; the pixels are decoded once, to grayscale
+            with instrumentation.stage('decode'):
+                width, height, dpi = image_info(image_bytes)
+                reason = self._triage(width, height)
+                if not reason:
+                    gray = normalize_resolution(decode_grayscale(image_bytes), dpi)
+            if not reason:
+                with instrumentation.stage('triage'):
+                    reason = self._triage(width, height, gray)
+            if reason:
+                return {"skipped": reason}
+            with instrumentation.stage('enhance'):
+                gray = sharpen(enhance_contrast(gray))
+            ocr_text = self._tesseract(gray)
+            raw_text = ocr_text.text
+            corrected, hits = self._correct_ocr_block(ocr_text) if raw_text else (AnnotatedText(''), Counter())
+            return {"raw_content": raw_text, "corrected_content": corrected.text,
+                    "annotations": corrected, "corrections": hits,
+                    "confidence": ocr_text.mean_confidence()}
+        except Exception:
+            return None
     
     def correct_text(self, text):
         """Advanced text correction with POS tagging"""
+        return self.correct_annotated(text).text
+    
+    def correct_annotated(self, text, hits=None, ocr_words=None):
+        """correct_text returning an AnnotatedText of the corrected sentences
+        
+        Tokens keep the POS tags of the OCR output they were corrected from, so the
+        block does not need tagging again for analysis. Per-rule correction counts
+        (including 'spell_check') are added to the hits Counter when given.
+        
+        ocr_words, the OCRText that text was read as, gates correction by word
+        confidence: dictionary words tesseract read at or above
+        confidence_threshold are kept as read.
+        """
         if not self.nltk_available or not text.strip():
-            return self.simple_correct(text)
+            return AnnotatedText(self.simple_correct(text, hits))
         
         try:
-            from nltk.tokenize import word_tokenize, sent_tokenize
-            from nltk.tag import pos_tag
-            
-            sentences = sent_tokenize(text)
+            annotated = self.annotator.annotate(text)
+            rules = self.correction_rules
             corrected_sentences = []
+            gated = ocr_words is not None and self.confidence_threshold is not None
+            if gated:
+                confidences = ocr_words.token_confidences(annotated.sentences)
             
-            for sentence in sentences:
-                words = word_tokenize(sentence)
-                pos_tags = pos_tag(words)
+            for i, (_, pos_tags) in enumerate(annotated.sentences):
                 corrected = []
                 
-                for word, pos in pos_tags:
+                for j, (word, pos) in enumerate(pos_tags):
                     if word in string.punctuation:
-                        corrected.append(word)
+                        corrected.append((word, pos))
                         continue
                     
-                    # Context-aware corrections
-                    if pos.startswith('NN'):  # Nouns
-                        word = re.sub(r'rn', 'm', word)
-                        word = re.sub(r'cl', 'd', word)
-                    elif pos.startswith('VB'):  # Verbs
-                        word = re.sub(r'1ng', 'ing', word)
-                    elif pos.startswith('DT'):  # Determiners
-                        if word.lower() in ['tlle', 'tl1e']:
-                            word = 'the'
+                    # Confidently read dictionary words need no correction
+                    if gated and self._trusted(word, confidences[i][j]):
+                        instrumentation.count('tokens_trusted')
+                        corrected.append((word, pos))
+                        continue
                     
-                    # OCR fixes
-                    if any(c.isdigit() for c in word) and any(c.isalpha() for c in word):
-                        word = re.sub(r'0', 'o', word)
-                        word = re.sub(r'1', 'l', word)
-                        word = re.sub(r'5', 'S', word)
-                        word = re.sub(r'8', 'B', word)
+                    # Context-aware and digit/letter OCR fixes
+                    word = rules.correct_token(word, pos, hits)
                     
                     # Spell check
                     if word.isalpha() and len(word) > 1:
-                        word = self.spell_check(word)
+                        checked = self.spell_check(word)
+                        if hits is not None and checked != word.lower():
+                            hits['spell_check'] += 1
+                        word = checked
                     
-                    corrected.append(word)
+                    corrected.append((word, pos))
                 
                 # Reconstruct sentence
-                s = ' '.join(corrected)
-                s = re.sub(r'\s+([,.!?;:])', r'\1', s)
-                s = re.sub(r'([,.!?;:])\s*([A-Za-z])', r'\1 \2', s)
-                corrected_sentences.append(s)
+                s = rules.sentence.apply(' '.join(word for word, _ in corrected))
+                corrected_sentences.append((s, corrected))
             
-            return re.sub(r'\s+', ' ', ' '.join(corrected_sentences)).strip()
+            corrected_text = ' '.join(' '.join(s for s, _ in corrected_sentences).split())
+            return AnnotatedText(corrected_text, corrected_sentences)
         except:
-            return self.simple_correct(text)
+            return AnnotatedText(self.simple_correct(text, hits))
     
-    def simple_correct(self, text):
+    def _trusted(self, word, confidence):
+        return (confidence is not None and confidence >= self.confidence_threshold
+                and word.lower() in self.english_words)
+    
+    def simple_correct(self, text, hits=None):
         """Fallback correction without advanced features"""
-        corrections = [
-            (r'rn', 'm'), (r'cl', 'd'), (r'vv', 'w'),
-            (r'(\w)1(\w)', r'\1l\2'), (r'(\w)0(\w)', r'\1o\2'),
-            (r'\s+', ' '), (r'\btlle\b', 'the'), (r'\btl1e\b', 'the'),
-            (r'\s+([,.!?;:])', r'\1')
-        ]
-        
-        corrected = text
-        for pattern, replacement in corrections:
-            corrected = re.sub(pattern, replacement, corrected)
-        return corrected.strip()
+        return self.correction_rules.simple.apply(text, hits).strip()
     
     def process_normal_text(self, text):
         """Process normal PDF text with NLTK cleaning and stopword filtering"""
+        return self.clean_annotated(text).text
+    
+    def clean_annotated(self, text):
+        """process_normal_text returning an AnnotatedText of the kept sentences"""
         if not text.strip():
-            return text.strip()
+            return AnnotatedText(text.strip())
         
         try:
-            # Clean up common PDF extraction issues
-            text = re.sub(r'\s+', ' ', text)  # Multiple spaces
-            text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # CamelCase splitting
-            text = re.sub(r'(\w)([.!?])', r'\1\2 ', text)  # Punctuation spacing
+            # Clean up common PDF extraction issues (spacing, camelCase runs, punctuation)
+            text = self.correction_rules.native.apply(text)
             
             if not self.nltk_available:
-                return text.strip()
-            
-            from nltk.tokenize import word_tokenize, sent_tokenize
+                return AnnotatedText(text.strip())
             
             # Sentence tokenization and cleaning
-            sentences = sent_tokenize(text)
+            annotated = self.annotator.annotate(text)
             cleaned_sentences = []
             
-            for sentence in sentences:
+            for sentence, tagged in annotated.sentences:
                 # Remove very short sentences (likely extraction errors)
                 if len(sentence.split()) < 3:
                     continue
                 
-                # Remove excessive stopwords from sentence
-                words = word_tokenize(sentence.lower())
-                
                 # Keep sentence structure but filter out excessive stopwords
                 # Only remove if more than 60% of words are stopwords
+                words = [word.lower() for word, _ in tagged]
                 content_words = [w for w in words if w not in self.stop_words and w.isalpha()]
                 if len(content_words) > len(words) * 0.4:  # At least 40% content words
-                    cleaned_sentences.append(sentence.strip())
+                    cleaned_sentences.append((sentence.strip(), tagged))
             
-            return ' '.join(cleaned_sentences)
+            return AnnotatedText(' '.join(s for s, _ in cleaned_sentences), cleaned_sentences)
         except:
-            return text.strip()
+            return AnnotatedText(text.strip())
     
-    def analyze_content(self, text):
-        """AI-like content analysis for frontend"""
-        if not text.strip():
-            return {
-                "concepts": [],
-                "difficulty": "Unknown",
-                "word_count": 0,
-                "estimated_reading_time": 0,
-                "key_topics": [],
-                "confidence_score": 0.0
-            }
-        
-        words = text.split()
-        word_count = len(words)
+    def content_analyzer(self):
+        """A fresh incremental ContentAnalyzer for one document"""
+        return ContentAnalyzer(self.annotator if self.nltk_available else None, self.stop_words)
+    
+    def analyze_content(self, text, annotations=None, confidence=None):
+        """AI-like content analysis for frontend
         
-        # Simple concept extraction (can be enhanced with NLP models)
-        concepts = []
-        key_terms = []
+        annotations, the AnnotatedText blocks that make up text, are aggregated
+        directly; without them the text is annotated here. confidence, the
+        document's recognition confidence (0-1), is reported as confidence_score;
+        without it the score is estimated from the amount of text found.
+        process_file feeds a content_analyzer() page by page instead.
+        """
+        analyzer = self.content_analyzer()
+        for block in annotations if annotations is not None else [AnnotatedText(text)]:
+            analyzer.add(block)
+        return analyzer.result(confidence)
+    
+    def process_file(self, file_path, user_id=None, cache_mode='use', profile=False,
+                     include_full_text=True):
+        """Main processing pipeline for frontend integration
         
-        # Look for academic/technical terms
-        if self.nltk_available:
+        cache_mode controls the result cache: 'use' returns a stored result for
+        identical content, 'refresh' recomputes and overwrites it, 'bypass' neither
+        reads nor writes. Stage timings and counters are returned in
+        processing_metadata.timings; profile=True also attaches a cProfile summary.
+        include_full_text=False leaves raw_text and corrected_text (copies of the
+        OCR output that extracted_text already contains) out of the result, and
+        they are then never accumulated for PDFs.
+        """
+        return _run_to_completion(self.iter_process_file(file_path, user_id, cache_mode, profile,
+                                                         include_full_text))
+    
+    def iter_process_file(self, file_path, user_id=None, cache_mode='use', profile=False,
+                          include_full_text=True):
+        """Streaming form of process_file: yields a progress record per page, returns the result"""
+        profiler = cProfile.Profile() if profile else None
+        with instrumentation.collect() as metrics:
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
             try:
-                from nltk.tokenize import word_tokenize
-                from nltk.tag import pos_tag
-                
-                tokens = word_tokenize(text.lower())
-                pos_tags = pos_tag(tokens)
-                
-                # Extract nouns as potential concepts (excluding stopwords)
-                nouns = [word for word, pos in pos_tags 
-                        if pos.startswith('NN') and len(word) > 3 
-                        and word not in self.stop_words]
-                noun_freq = Counter(nouns)
-                concepts = [word.title() for word, freq in noun_freq.most_common(8) if freq > 1]
-                
-                # Extract proper nouns as key topics
-                proper_nouns = [word for word, pos in pos_tags 
-                              if pos == 'NNP' and len(word) > 2]
-                key_topics = list(set(proper_nouns))[:5]
-                
-            except:
-                # Fallback to simple word analysis
-                words_clean = [w.lower().strip('.,!?;:') for w in words 
-                             if len(w) > 4 and w.lower() not in self.stop_words]
-                word_freq = Counter(words_clean)
-                concepts = [w.title() for w, f in word_freq.most_common(6)]
-                key_topics = concepts[:3]
-        else:
-            # Simple analysis without NLTK
-            basic_stopwords = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'this', 'that', 'these', 'those'}
-            words_clean = [w.lower().strip('.,!?;:') for w in words 
-                         if len(w) > 4 and w.lower() not in basic_stopwords]
-            word_freq = Counter(words_clean)
-            concepts = [w.title() for w, f in word_freq.most_common(6)]
-            key_topics = concepts[:3]
-        
-        # Estimate difficulty based on word complexity
-        complex_words = [w for w in words if len(w) > 8]
-        complexity_ratio = len(complex_words) / max(word_count, 1)
-        
-        if complexity_ratio > 0.15:
-            difficulty = "Advanced"
-        elif complexity_ratio > 0.08:
-            difficulty = "Intermediate"
-        else:
-            difficulty = "Beginner"
+                result = yield from self._iter_process_file(file_path, user_id, cache_mode,
+                                                            include_full_text)
+            finally:
+                if profiler:
+                    profiler.disable()
+            metrics.add_time('total', time.perf_counter() - start)
         
-        # Reading time (average 200 words per minute)
-        reading_time = max(1, round(word_count / 200))
-        
-        # Confidence score based on text quality
-        confidence_score = min(1.0, max(0.1, (word_count / 100) * 0.8 + (len(concepts) / 10) * 0.2))
-        
-        return {
-            "concepts": concepts,
-            "difficulty": difficulty,
-            "word_count": word_count,
-            "estimated_reading_time": reading_time,
-            "key_topics": key_topics,
-            "confidence_score": round(confidence_score, 2)
-        }
+        processing_metadata = result.setdefault('processing_metadata', {})
+        processing_metadata['timings'] = metrics.as_dict()
+        if profiler:
+            # cProfile sees the calling thread only; pool threads show up as waits
+            processing_metadata['profile'] = instrumentation.profile_report(profiler)
+        return result
     
-    def process_file(self, file_path, user_id=None):
-        """Main processing pipeline for frontend integration"""
+    def _iter_process_file(self, file_path, user_id, cache_mode, include_full_text):
         try:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"File not found: {file_path}")
+            if cache_mode not in CACHE_MODES:
+                raise ValueError(f"cache_mode must be one of {CACHE_MODES}, got {cache_mode!r}")
+            
+            # Identical bytes under the same pipeline config give the same result
+            cache_key = None
+            if self.result_cache and cache_mode != 'bypass':
+                config = self.cache_config()
+                if not include_full_text:
+                    config = {**config, "include_full_text": False}
+                with instrumentation.stage('hash'):
+                    cache_key = config_key(file_digest(file_path), config)
+                with instrumentation.stage('result_cache'):
+                    cached = self.result_cache.get(cache_key) if cache_mode == 'use' else None
+                if cached is not None:
+                    cached['user_id'] = user_id or "anonymous"
+                    cached['file_info']['original_name'] = os.path.basename(file_path)
+                    cached['processing_metadata']['result_cache'] = {"status": "hit"}
+                    return cached
+            
+            cache_before = self.correction_cache.stats()
             
             # Process based on file type
             file_ext = os.path.splitext(file_path)[1].lower()
             
+            # Each text block is folded into the analysis as it is produced
+            analyzer = self.content_analyzer()
             if file_ext == '.pdf':
-                result = self.process_pdf(file_path)
-            elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-                result = self.process_image(file_path)
+                result = yield from self.iter_process_pdf(file_path, cache_mode, analyzer,
+                                                          include_full_text)
+            elif file_ext in IMAGE_EXTENSIONS:
+                result = self.process_image(file_path, analyzer)
+                yield self._page_record(1, 1, "", [{
+                    "image": 1,
+                    "raw_content": result['raw_text'],
+                    "corrected_content": result['corrected_text'],
+                    "confidence": result['confidence']
+                }] if result['raw_text'] else [], len(result['extracted_text'].split()))
             else:
                 raise ValueError(f"Unsupported file type: {file_ext}")
             
             # Analyze content
             all_text = result['extracted_text']
-            analysis = self.analyze_content(all_text)
+            analysis = analyzer.result(result.get('confidence'))
+            cache_after = self.correction_cache.stats()
             
             # Create Firebase-ready JSON structure (Firebase will add timestamp and ID)
             firebase_data = {
@@ -348,8 +629,8 @@ class OCRPipeline:
                     "processing_method": result['processing_method']
                 },
                 "extraction_results": {
-                    "raw_text": result['raw_text'],
-                    "corrected_text": result['corrected_text'],
+                    **({"raw_text": result['raw_text'], "corrected_text": result['corrected_text']}
+                       if include_full_text else {}),
                     "extracted_text": all_text,
                     "pages_processed": result['pages_processed'],
                     "images_processed": result['images_processed']
@@ -358,10 +639,30 @@ class OCRPipeline:
                 "processing_metadata": {
                     "nltk_available": self.nltk_available,
                     "processing_time": result.get('processing_time', 0),
-                    "corrections_applied": result.get('corrections_applied', 0)
+                    "corrections_applied": result.get('corrections_applied', 0),
+                    "correction_rules": result.get('correction_rules', {}),
+                    "duplicate_images_skipped": result.get('duplicate_images_skipped', 0),
+                    "images_skipped": result.get('images_skipped', 0),
+                    "page_routes": result.get('page_routes', {}),
+                    "ocr_engine": self._get_ocr_engine().name,
+                    "correction_cache": {
+                        "hits": cache_after['hits'] - cache_before['hits'],
+                        "misses": cache_after['misses'] - cache_before['misses'],
+                        "size": cache_after['size']
+                    },
+                    "result_cache": {
+                        "status": ("disabled" if not self.result_cache
+                                   else "bypass" if cache_mode == 'bypass'
+                                   else "refresh" if cache_mode == 'refresh' else "miss"),
+                        "pages_from_cache": result.get('pages_from_cache', 0)
+                    }
                 }
             }
             
+            if cache_key:
+                with instrumentation.stage('result_cache'):
+                    self.result_cache.put(cache_key, {k: v for k, v in firebase_data.items() if k != 'user_id'})
+            
             return firebase_data
             
         except Exception as e:
@@ -377,71 +678,226 @@ class OCRPipeline:
                 }
             }
     
-    def process_pdf(self, pdf_path):
+    def iter_pdf_pages(self, pdf_path):
+        """Yield one unit per page from a single fitz pass: native text, route and the images to OCR
+        
+        Routing happens before any image is extracted, so images the route skips
+        are never decoded. On the page_render route the single image is the
+        rasterised page, numbered 0.
+        """
+        with fitz.open(pdf_path) as pdf_doc:
+            for page_index, page in enumerate(pdf_doc):
+                page_num = page_index + 1
+                with instrumentation.stage('extract', page=page_num):
+                    text = page.get_text("text", sort=True)
+                    image_refs = page.get_images(full=True)
+                with instrumentation.stage('route', page=page_num):
+                    route, routed_out = self._route_page(page, text, image_refs)
+                instrumentation.count(f'pages_{route}')
+                
+                images = []
+                if route == PAGE_RENDER:
+                    with instrumentation.stage('render', page=page_num):
+                        pix = page.get_pixmap(dpi=self.render_dpi, colorspace=fitz.csGRAY, alpha=False)
+                        images.append({"image": 0, "xref": None, "bytes": pix.tobytes('pgm'),
+                                       "pixels": pix.width * pix.height})
+                        pix = None
+                with instrumentation.stage('extract', page=page_num):
+                    for img_idx, img_info in enumerate(image_refs, 1):
+                        if img_idx in routed_out:
+                            continue
+                        try:
+                            base_img = pdf_doc.extract_image(img_info[0])
+                        except Exception:
+                            continue
+                        images.append({"image": img_idx, "xref": img_info[0], "bytes": base_img["image"],
+                                       "pixels": base_img["width"] * base_img["height"]})
+                unit = {
+                    "page": page_num,
+                    "page_count": len(pdf_doc),
+                    "text": text,
+                    "images": images,
+                    "route": {
+                        "route": route,
+                        "cost": {
+                            "ocr_images": len(images),
+                            "megapixels": round(sum(img['pixels'] for img in images) / 1e6, 2)
+                        }
+                    },
+                    "routed_out": [{"image": i, "reason": reason} for i, reason in sorted(routed_out.items())]
+                }
+                instrumentation.count('pages')
+                yield unit
+    
+    def _route_page(self, page, text, image_refs):
+        """(route, {image index: skip reason}); without routing every embedded image is OCR'd"""
+        if self.page_routing:
+            return route_page(page, text, image_refs)
+        return (IMAGE_OCR if image_refs else NATIVE), {}
+    
+    def _page_record(self, page_num, page_count, native_text, ocr_blocks, running_word_count):
+        """Progress record emitted after each page in streaming mode"""
+        return {
+            "type": "page",
+            "page": page_num,
+            "page_count": page_count,
+            "native_text": native_text,
+            "ocr_blocks": ocr_blocks,
+            "running_word_count": running_word_count
+        }
+    
+    def _lookup_page_cache(self, pages, cache_mode):
+        """Key each page unit by its content; pages seen before carry their cached result
+        
+        A cached page has its images dropped so the OCR stage skips it entirely.
+        """
+        for page in pages:
+            if self.result_cache and cache_mode != 'bypass':
+                with instrumentation.stage('page_cache', page=page['page']):
+                    digest = hashlib.sha256(page['text'].encode('utf-8'))
+                    digest.update(page['route']['route'].encode('ascii'))
+                    for img in page['images']:
+                        digest.update(img['bytes'])
+                    page['cache_key'] = config_key(digest.hexdigest(), self.cache_config())
+                    if cache_mode == 'use':
+                        cached = self.result_cache.get(page['cache_key'], kind='page')
+                        if cached is not None:
+                            page['cached'] = cached
+                            page['images'] = []
+            yield page
+    
+    def _process_page(self, page, image_results):
+        """Clean a page's native text and collect its OCR blocks
+        
+        Returns the (cacheable) page entry, the native text's AnnotatedText or None,
+        and the AnnotatedText of each OCR block.
+        """
+        text = page['text']
+        native_text = native_annotations = None
+        if text.strip():
+            with instrumentation.stage('native_text', page=page['page']):
+                native_annotations = self.clean_annotated(text)
+            native_text = native_annotations.text
+        ocr_blocks = []
+        ocr_annotations = []
+        skipped_images = list(page['routed_out'])
+        corrections = Counter()
+        for img, result in zip(page['images'], image_results):
+            if not result:
+                continue
+            if 'skipped' in result:
+                skipped_images.append({"image": img['image'], "reason": result['skipped']})
+                continue
+            if not result['raw_content']:
+                continue
+            corrections.update(result['corrections'])
+            ocr_blocks.append({
+                "image": img['image'],
+                "raw_content": result['raw_content'],
+                "corrected_content": result['corrected_content'],
+                "confidence": _round(result['confidence'])
+            })
+            # Repeated images come from the memo without annotations
+            ocr_annotations.append(result.get('annotations') or AnnotatedText(result['corrected_content']))
+        entry = {"native_text": native_text, "ocr_blocks": ocr_blocks,
+                 "skipped_images": skipped_images, "corrections": dict(corrections),
+                 "route": page['route']}
+        return entry, native_annotations, ocr_annotations
+    
+    def process_pdf(self, pdf_path, cache_mode='bypass', analyzer=None, include_full_text=True):
         """Process PDF file with hybrid approach"""
-        start_time = datetime.now()
+        return _run_to_completion(self.iter_process_pdf(pdf_path, cache_mode, analyzer,
+                                                        include_full_text))
+    
+    def iter_process_pdf(self, pdf_path, cache_mode='bypass', analyzer=None, include_full_text=True):
+        """Process a PDF page by page, yielding a progress record per page; returns the result
+        
+        When a ContentAnalyzer is given, every text block is added to it as its page
+        is processed (native text as group 0, OCR text as group 1) and then dropped.
+        Without include_full_text, raw_text/corrected_text and the raw content of
+        OCR blocks are not kept.
+        """
+        start_time = time.perf_counter()
         text_blocks = []
         image_blocks = []
+        skipped_blocks = []
+        route_blocks = []
         raw_texts = []
         corrected_texts = []
-        corrections_count = 0
+        corrections = Counter()
+        word_count = 0
+        confident_words = 0.0  # native words count fully, OCR words by their confidence
+        pages_from_cache = 0
+        ocr_stats = {'duplicate_images_skipped': 0}
         
-        # Extract native text with pdfplumber
+        # Single parser pass: each page unit carries its native text and image bytes,
+        # so memory scales with the largest page rather than the whole document
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text() or ''
-                    if text.strip():
-                        # Process normal text with NLTK cleaning
-                        cleaned_text = self.process_normal_text(text)
-                        text_blocks.append({
-                            "page": page_num,
-                            "type": "native_text",
-                            "content": cleaned_text
-                        })
-        except Exception as e:
-            raise Exception(f"Error with pdfplumber: {e}")
-        
-        # Extract and OCR images
-        try:
-            pdf_doc = fitz.open(pdf_path)
-            for page_num in range(len(pdf_doc)):
-                page = pdf_doc[page_num]
-                page_num += 1  # Make it 1-indexed
-                images = page.get_images(full=True)
-                for img_idx, img_info in enumerate(images, 1):
-                    try:
-                        xref = img_info[0]
-                        base_img = pdf_doc.extract_image(xref)
-                        image_bytes = base_img["image"]
-                        
-                        # Process image
-                        pil_img = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-                        pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
-                        pil_img = ImageEnhance.Sharpness(pil_img).enhance(2.0)
-                        
-                        img_cv = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-                        raw_text = pytesseract.image_to_string(img_cv, config='--oem 3 --psm 6 -l eng').strip()
-                        
-                        if raw_text:
-                            corrected_text = self.correct_text(raw_text)
-                            corrections_count += len(raw_text.split()) - len(corrected_text.split())
-                            
-                            raw_texts.append(raw_text)
-                            corrected_texts.append(corrected_text)
-                            
-                            image_blocks.append({
-                                "page": page_num,
-                                "image": img_idx,
-                                "type": "ocr_text",
-                                "raw_content": raw_text,
-                                "corrected_content": corrected_text
-                            })
-                    except Exception:
-                        continue
-            pdf_doc.close()
+            pages = self._lookup_page_cache(self.iter_pdf_pages(pdf_path), cache_mode)
+            for page, image_results in self._ocr_pages(pages, ocr_stats):
+                page_num = page['page']
+                entry = page.get('cached')
+                if entry is None:
+                    entry, native_block, ocr_block_annotations = self._process_page(page, image_results)
+                    if page.get('cache_key'):
+                        self.result_cache.put(page['cache_key'], entry, kind='page')
+                else:
+                    # Annotations are not cached; analysis annotates these blocks itself
+                    pages_from_cache += 1
+                    native_block = AnnotatedText(entry['native_text'])
+                    ocr_block_annotations = [AnnotatedText(b['corrected_content']) for b in entry['ocr_blocks']]
+                
+                if analyzer is not None:
+                    with instrumentation.stage('analyze_content', page=page_num):
+                        if entry['native_text'] is not None:
+                            analyzer.add(native_block, 0)
+                        for block in ocr_block_annotations:
+                            analyzer.add(block, 1)
+                native_block = ocr_block_annotations = None
+                
+                if entry['native_text'] is not None:
+                    native_words = len(entry['native_text'].split())
+                    word_count += native_words
+                    confident_words += native_words
+                    text_blocks.append({
+                        "page": page_num,
+                        "type": "native_text",
+                        "content": entry['native_text']
+                    })
+                
+                for block in entry['ocr_blocks']:
+                    if include_full_text:
+                        raw_texts.append(block['raw_content'])
+                        corrected_texts.append(block['corrected_content'])
+                    block_words = len(block['corrected_content'].split())
+                    word_count += block_words
+                    confident_words += block_words * (block['confidence'] or 0)
+                    image_blocks.append({
+                        "page": page_num,
+                        "image": block['image'],
+                        "type": "ocr_text",
+                        **({"raw_content": block['raw_content']} if include_full_text else {}),
+                        "corrected_content": block['corrected_content'],
+                        "confidence": block['confidence']
+                    })
+                for skipped in entry['skipped_images']:
+                    skipped_blocks.append({
+                        "page": page_num,
+                        "image": skipped['image'],
+                        "type": "skipped_image",
+                        "reason": skipped['reason']
+                    })
+                corrections.update(entry['corrections'])
+                route_blocks.append({
+                    "page": page_num,
+                    "type": "page_route",
+                    **entry['route']
+                })
+                
+                yield self._page_record(page_num, page['page_count'], entry['native_text'] or "",
+                                        entry['ocr_blocks'], word_count)
         except Exception as e:
-            raise Exception(f"Error with image processing: {e}")
+            raise Exception(f"Error processing PDF: {e}")
         
         # Combine all text
         all_text_parts = []
@@ -450,39 +906,48 @@ class OCRPipeline:
         for block in image_blocks:
             all_text_parts.append(block['corrected_content'])
         
-        processing_time = (datetime.now() - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
         
-        return {
+        result = {
             "processing_method": "hybrid_pdf",
             "extracted_text": "\n\n".join(all_text_parts),
-            "raw_text": "\n\n".join(raw_texts),
-            "corrected_text": "\n\n".join(corrected_texts),
             "pages_processed": len(set([b['page'] for b in text_blocks + image_blocks])),
             "images_processed": len(image_blocks),
             "processing_time": round(processing_time, 2),
-            "corrections_applied": abs(corrections_count),
-            "detailed_blocks": text_blocks + image_blocks
+            "corrections_applied": sum(corrections.values()),
+            "correction_rules": dict(corrections),
+            "confidence": _round(confident_words / word_count) if word_count else None,
+            "pages_from_cache": pages_from_cache,
+            "duplicate_images_skipped": ocr_stats['duplicate_images_skipped'],
+            "images_skipped": len(skipped_blocks),
+            "page_routes": dict(Counter(b['route'] for b in route_blocks)),
+            "detailed_blocks": text_blocks + image_blocks + skipped_blocks + route_blocks
         }
+        if include_full_text:
+            result["raw_text"] = "\n\n".join(raw_texts)
+            result["corrected_text"] = "\n\n".join(corrected_texts)
+        return result
     
-    def process_image(self, image_path):
-        """Process single image file"""
-        start_time = datetime.now()
+    def process_image(self, image_path, analyzer=None):
+        """Process single image file (analyzer: optional ContentAnalyzer to add the text to)"""
+        start_time = time.perf_counter()
         
         try:
-            # Load and enhance image
-            pil_img = Image.open(image_path).convert('RGB')
-            pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
-            pil_img = ImageEnhance.Sharpness(pil_img).enhance(2.0)
-            
-            # Convert to OpenCV format
-            img_cv = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-            
-            # OCR
-            raw_text = pytesseract.image_to_string(img_cv, config='--oem 3 --psm 6 -l eng').strip()
-            corrected_text = self.correct_text(raw_text) if raw_text else ""
+            with instrumentation.page_scope(1):
+                # Decode to grayscale, normalise resolution and enhance
+                gray = self._prepare_image(image_path)
+                
+                # OCR
+                ocr_text = self._tesseract(gray)
+                raw_text = ocr_text.text
+                corrected, corrections = (self._correct_ocr_block(ocr_text) if raw_text
+                                          else (AnnotatedText(""), Counter()))
+            corrected_text = corrected.text
+            if analyzer is not None:
+                with instrumentation.stage('analyze_content', page=1):
+                    analyzer.add(corrected)
             
-            processing_time = (datetime.now() - start_time).total_seconds()
-            corrections_count = len(raw_text.split()) - len(corrected_text.split()) if raw_text and corrected_text else 0
+            processing_time = time.perf_counter() - start_time
             
             return {
                 "processing_method": "image_ocr",
@@ -492,20 +957,449 @@ class OCRPipeline:
                 "pages_processed": 1,
                 "images_processed": 1,
                 "processing_time": round(processing_time, 2),
-                "corrections_applied": abs(corrections_count)
+                "corrections_applied": sum(corrections.values()),
+                "correction_rules": dict(corrections),
+                "confidence": _round(ocr_text.mean_confidence())
             }
         except Exception as e:
             raise Exception(f"Error processing image: {e}")
 
-def main():
-    if len(sys.argv) != 2:
+_MISSING = object()
+
+def _memo_entry(result):
+    """What a repeat of an image needs: its result without the (large) annotations"""
+    if result and 'annotations' in result:
+        return {key: value for key, value in result.items() if key != 'annotations'}
+    return result
+
+def _completed(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+def _page_results(jobs, keys, seen):
+    """Results of a page's finished futures; its images' memo entries drop the futures"""
+    results = [f.result() for f in jobs]
+    for key in keys:
+        job = seen[key]
+        if isinstance(job, Future):
+            seen[key] = _memo_entry(job.result())
+    return results
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+def _run_to_completion(generator):
+    """Drain a streaming generator and return its return value"""
+    while True:
+        try:
+            next(generator)
+        except StopIteration as stop:
+            return stop.value
+
+# Correction process pool workers each hold their own pipeline
+_worker_pipeline = None
+
+def _init_correction_worker(options):
+    global _worker_pipeline
+    _worker_pipeline = OCRPipeline(**options)
+    _worker_pipeline.correction_cache.record_updates = True
+
+def _correct_text_in_worker(ocr_text):
+    """(AnnotatedText, rule hits, correction cache updates) for one OCR block"""
+    hits = Counter()
+    corrected = _worker_pipeline.correct_annotated(ocr_text.text, hits, ocr_text)
+    return corrected, hits, _worker_pipeline.correction_cache.take_updates()
+
+def format_response(result):
+    """Shape a process_file result into the response expected by the frontend"""
+    # Check if processing failed
+    if result.get('error'):
+        return {
+            'success': False,
+            'error': result.get('error_message', 'Unknown processing error')
+        }
+    
+    # Format response for frontend
+    extracted_text = result.get('extraction_results', {}).get('extracted_text', '')
+    raw_text = result.get('extraction_results', {}).get('raw_text', '')
+    corrected_text = result.get('extraction_results', {}).get('corrected_text', '')
+    ai_analysis = result.get('ai_analysis', {})
+    
+    return {
+        'success': True,
+        'finalExtractedText': extracted_text,
+        'originalOcrOutput': raw_text,
+        'enhancedTextNltk': corrected_text,
+        'wordCount': ai_analysis.get('word_count', len(extracted_text.split())),
+        'readingTime': ai_analysis.get('estimated_reading_time', max(1, len(extracted_text.split()) // 200)),
+        'confidenceScore': ai_analysis.get('confidence_score', 0.85),
+        'concepts': ai_analysis.get('concepts', []),
+        'keyTopics': ai_analysis.get('key_topics', []),
+        'difficulty': ai_analysis.get('difficulty', 'Intermediate'),
+        'processingMetadata': result.get('processing_metadata', {}),
+        'fileInfo': result.get('extraction_results', {})
+    }
+
+def job_priority(file_path):
+    """Default queue priority of a file: images first, long PDFs last"""
+    if os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS:
+        return 'high'
+    try:
+        with fitz.open(file_path) as doc:
+            pages = doc.page_count
+    except Exception:
+        return 'normal'
+    return 'low' if pages > LONG_DOCUMENT_PAGES else 'normal'
+
+def serve(ocr, instream=None, outstream=None, cache_mode='use', max_jobs=1, max_queued=16,
+          job_timeout=None, include_full_text=True):
+    """Resident worker loop: one JSON request per line in, one JSON response per line out
+    
+    Process: {"id": "job-1", "file_path": "/path/to/file.pdf", "user_id": "optional",
+              "stream": false, "cache": "use" | "refresh" | "bypass", "profile": false,
+              "priority": "high" | "normal" | "low", "timeout": seconds,
+              "full_text": true}
+             ("op": "process" is implied)
+    Response: {"id": "job-1", "success": true, ...same fields as the CLI response}
+    
+    With "stream": true, each processed page is first reported as
+    {"id": "job-1", "event": "progress", "type": "page", ...page record}.
+    
+    Jobs run on a JobQueue: up to max_jobs at once and max_queued waiting,
+    highest priority first (by default images, then PDFs, then PDFs over
+    LONG_DOCUMENT_PAGES pages). A job that does not fit is answered at once
+    with {"id", "success": false, "status": "busy"}; one cancelled or past its
+    timeout (job_timeout by default) stops at the next page and is answered
+    with "status": "cancelled" or "timeout". Responses therefore arrive in
+    completion order, not request order.
+    
+    Cancel: {"op": "cancel", "id": "c-1", "job_id": "job-1"} -> {"id": "c-1", "success": true, "cancelled": bool}
+    Stats:  {"op": "stats", "id": "s-1"} -> {"id": "s-1", "success": true, "stats": {queue depth, latencies}}
+    
+    The pipeline (NLTK corpora, dictionaries) is built once by the caller and
+    shared by every job, so each request only pays for the OCR work itself.
+    """
+    instream = instream or sys.stdin
+    outstream = outstream or sys.stdout
+    write_lock = threading.Lock()
+    
+    def emit(message):
+        line = json.dumps(message) + '\n'
+        with write_lock:
+            outstream.write(line)
+            outstream.flush()
+    
+    def run_job(job_id, job, token):
+        records = ocr.iter_process_file(job['file_path'], user_id=job.get('user_id'),
+                                        cache_mode=job.get('cache', cache_mode),
+                                        profile=bool(job.get('profile')),
+                                        include_full_text=job.get('full_text', include_full_text))
+        on_record = (lambda record: emit({'id': job_id, 'event': 'progress', **record})
+                     if job.get('stream') else None)
+        return drain(records, token, on_record)
+    
+    def finish_job(job_id, status, value):
+        if status == 'done':
+            response = format_response(value)
+            ocr.save_caches()
+        elif status == 'error':
+            response = {'success': False, 'error': str(value)}
+        else:
+            response = {'success': False, 'status': status, 'error': str(value)}
+        emit({'id': job_id, **response})
+    
+    jobs = JobQueue(max_jobs, max_queued, job_timeout)
+    emit({'event': 'ready', 'pid': os.getpid(), 'max_jobs': jobs.max_concurrent,
+          'max_queued': jobs.max_queued})
+    
+    try:
+        for line in instream:
+            line = line.strip()
+            if not line:
+                continue
+            
+            job_id = None
+            try:
+                job = json.loads(line)
+                job_id = job.get('id')
+                op = job.get('op', 'process')
+                if op == 'stats':
+                    emit({'id': job_id, 'success': True, 'stats': jobs.stats()})
+                    continue
+                if op == 'cancel':
+                    emit({'id': job_id, 'success': True, 'job_id': job['job_id'],
+                          'cancelled': jobs.cancel(job['job_id'])})
+                    continue
+                if op != 'process':
+                    raise ValueError(f'unknown op {op!r}')
+                file_path = job['file_path']
+            except Exception as e:
+                emit({'id': job_id, 'success': False, 'error': f'Invalid request: {e}'})
+                continue
+            
+            if not os.path.exists(file_path):
+                emit({'id': job_id, 'success': False, 'error': f'File not found: {file_path}'})
+                continue
+            
+            try:
+                jobs.submit(job_id, lambda token, job_id=job_id, job=job: run_job(job_id, job, token),
+                            priority=job.get('priority') or job_priority(file_path),
+                            timeout=job.get('timeout'),
+                            on_finish=lambda status, value, job_id=job_id: finish_job(job_id, status, value))
+            except QueueFull as e:
+                emit({'id': job_id, 'success': False, 'status': 'busy', 'error': str(e)})
+            except Exception as e:
+                emit({'id': job_id, 'success': False, 'error': f'Invalid request: {e}'})
+    except KeyboardInterrupt:
+        jobs.close(wait=False)
+        raise
+    # Input closed: finish what was accepted before exiting
+    jobs.close(wait=True)
+
+def collect_batch_inputs(paths, manifest=None):
+    """Expand files, directories (recursively) and a manifest into the list of files to process
+    
+    A manifest is a text file with one path per line; relative paths are resolved
+    against the manifest's directory and lines starting with # are ignored.
+    """
+    files = []
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    files.append(os.path.join(base, line))
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        files.append(os.path.join(root, name))
+        else:
+            files.append(path)
+    return files
+
+def _percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-q * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+def run_batch(ocr, files, output_dir, output_format='jsonl', workers=2, cache_mode='use',
+              include_full_text=True):
+    """Process many files with one pipeline, writing per-file results and a summary
+    
+    Files run concurrently on `workers` threads sharing the pipeline (dictionaries,
+    caches and image OCR pool). Each result is written as soon as it completes:
+    either one <input path>.json per file under output_dir, mirroring the input
+    layout, or one line per file in output_dir/results.jsonl. The summary with
+    throughput and latency percentiles is written to output_dir/summary.json and
+    returned.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files]) if files else ''
+    
+    def run_one(path):
+        start = time.perf_counter()
+        try:
+            result = ocr.process_file(path, cache_mode=cache_mode, include_full_text=include_full_text)
+        except Exception as e:
+            result = {"error": True, "error_message": str(e)}
+        return result, time.perf_counter() - start
+    
+    latencies = []
+    pages = failed = 0
+    jsonl = None
+    if output_format == 'jsonl':
+        jsonl = open(os.path.join(output_dir, 'results.jsonl'), 'w', encoding='utf-8')
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_one, path): path for path in files}
+            for future in as_completed(futures):
+                path = futures[future]
+                result, latency = future.result()
+                latencies.append(latency)
+                if result.get('error'):
+                    failed += 1
+                else:
+                    pages += result['extraction_results']['pages_processed']
+                
+                response = {'file': path, 'latency_ms': round(latency * 1000, 1), **format_response(result)}
+                if jsonl:
+                    jsonl.write(json.dumps(response) + '\n')
+                    jsonl.flush()
+                else:
+                    out_path = os.path.join(output_dir, os.path.relpath(os.path.abspath(path), root) + '.json')
+                    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                    with open(out_path, 'w', encoding='utf-8') as f:
+                        json.dump(response, f)
+    finally:
+        if jsonl:
+            jsonl.close()
+    elapsed = time.perf_counter() - start
+    ocr.save_caches()
+    
+    latencies.sort()
+    summary = {
+        'files': len(files),
+        'succeeded': len(files) - failed,
+        'failed': failed,
+        'pages': pages,
+        'workers': workers,
+        'elapsed_seconds': round(elapsed, 3),
+        'files_per_sec': round(len(files) / elapsed, 3) if elapsed else 0,
+        'pages_per_sec': round(pages / elapsed, 3) if elapsed else 0,
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 50) * 1000, 1),
+            'p90': round(_percentile(latencies, 90) * 1000, 1),
+            'p99': round(_percentile(latencies, 99) * 1000, 1),
+            'max': round(latencies[-1] * 1000, 1) if latencies else 0
+        },
+        'output': os.path.join(output_dir, 'results.jsonl') if jsonl else output_dir
+    }
+    with open(os.path.join(output_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+class _JsonArgumentParser(argparse.ArgumentParser):
+    """Argument parser that reports usage errors as JSON on stdout"""
+    def error(self, message):
         print(json.dumps({
             'success': False,
-            'error': 'Usage: python ocr_wrapper.py <file_path>'
+            'error': (f'{message}. Usage: python ocr_wrapper.py [--stream] <file_path> | --serve'
+                      ' | --batch <files/dirs...> [--manifest FILE]')
         }))
         sys.exit(1)
+
+def main():
+    parser = _JsonArgumentParser(description='Conceptify OCR pipeline')
+    parser.add_argument('file_path', nargs='*', help='File to process (files or directories with --batch)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a resident worker reading JSON jobs from stdin')
+    parser.add_argument('--max-jobs', type=int, default=1,
+                        help='Serve mode: documents processed concurrently')
+    parser.add_argument('--queue-size', type=int, default=16,
+                        help='Serve mode: jobs waiting beyond --max-jobs before requests are answered "busy"')
+    parser.add_argument('--job-timeout', type=float, default=None,
+                        help='Serve mode: default per-job wall-clock limit in seconds, from acceptance')
+    parser.add_argument('--stream', action='store_true',
+                        help='Print a JSON line per processed page, then the result line')
+    parser.add_argument('--profile', action='store_true',
+                        help='Attach a cProfile summary to processing_metadata.profile')
+    parser.add_argument('--no-full-text', action='store_true',
+                        help='Leave raw_text/corrected_text out of results; extracted_text has the content')
+    parser.add_argument('--batch', action='store_true',
+                        help='Process many files/directories with one pipeline and write results to --output-dir')
+    parser.add_argument('--manifest', default=None,
+                        help='Text file listing files to process, one per line (implies --batch)')
+    parser.add_argument('--output-dir', default='ocr_batch_results',
+                        help='Batch mode: directory for per-file results and summary.json')
+    parser.add_argument('--format', choices=('jsonl', 'json'), default='jsonl',
+                        help='Batch mode: one results.jsonl, or one JSON file per input file')
+    parser.add_argument('--batch-workers', type=int, default=2,
+                        help='Batch mode: files processed concurrently')
+    parser.add_argument('--correction-cache', default=DEFAULT_CORRECTION_CACHE,
+                        help='File used to persist spell-check corrections between runs')
+    parser.add_argument('--no-correction-cache', action='store_true',
+                        help='Keep the correction cache in memory only')
+    parser.add_argument('--lexicon-snapshot', default=DEFAULT_LEXICON_SNAPSHOT,
+                        help='Memory-mapped dictionary snapshot (built on first use)')
+    parser.add_argument('--executor', choices=EXECUTOR_MODES, default='thread',
+                        help='How embedded images are OCR\'d: sequentially, on a thread pool, '
+                             'or threads for tesseract plus a process pool for correction')
+    parser.add_argument('--ocr-engine', choices=ENGINES, default='auto',
+                        help='Resident in-process tesseract engines (tesserocr), a tesseract '
+                             'subprocess per image (pytesseract), or tesserocr when installed (auto)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker threads/processes (default: CPU count)')
+    parser.add_argument('--max-concurrency', type=int, default=None,
+                        help='Images in flight per document (default: --workers)')
+    parser.add_argument('--no-image-triage', action='store_true',
+                        help='OCR every embedded image, even tiny, blank or edge-free ones')
+    parser.add_argument('--min-text-score', type=float, default=None,
+                        help='Also skip images whose text-likelihood score is below this (e.g. 0.5)')
+    parser.add_argument('--no-page-routing', action='store_true',
+                        help='OCR every embedded image of every PDF page and never render pages')
+    parser.add_argument('--render-dpi', type=int, default=RENDER_DPI,
+                        help='Resolution pages without a text layer are rendered at for OCR')
+    parser.add_argument('--confidence-threshold', type=float, default=DEFAULT_CONFIDENCE_THRESHOLD,
+                        help='Tesseract word confidence (0-100) at or above which dictionary words '
+                             'skip correction (0 corrects every word)')
+    parser.add_argument('--result-cache', default=DEFAULT_RESULT_CACHE_DIR,
+                        help='Directory for cached results keyed by file hash')
+    parser.add_argument('--result-cache-size', type=int, default=512,
+                        help='Result cache size limit in MB')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Bypass the result cache (neither read nor write)')
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help='Recompute and overwrite any cached result for this file')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='Delete all cached results before running')
+    args = parser.parse_args()
+    
+    if args.clear_cache:
+        ResultCache(args.result_cache).clear()
+        if not args.serve and not args.file_path and not args.manifest:
+            print(json.dumps({'success': True, 'message': 'Result cache cleared'}))
+            return
+    cache_mode = 'bypass' if args.no_cache else 'refresh' if args.refresh_cache else 'use'
+    
+    pipeline_options = {
+        'correction_cache_path': None if args.no_correction_cache else args.correction_cache,
+        'lexicon_snapshot_path': args.lexicon_snapshot,
+        'executor_mode': args.executor,
+        'max_workers': args.workers,
+        'max_concurrency': args.max_concurrency,
+        'result_cache_dir': args.result_cache,
+        'result_cache_max_bytes': args.result_cache_size * 1024 * 1024,
+        'image_triage': not args.no_image_triage,
+        'min_text_score': args.min_text_score,
+        'confidence_threshold': args.confidence_threshold or None,
+        'page_routing': not args.no_page_routing,
+        'render_dpi': args.render_dpi,
+        'ocr_engine': args.ocr_engine
+    }
     
-    file_path = sys.argv[1]
+    if args.serve:
+        # Keep stdout reserved for the JSON-lines protocol; stray prints go to stderr
+        protocol_out = sys.stdout
+        sys.stdout = sys.stderr
+        ocr = OCRPipeline(**pipeline_options)
+        try:
+            serve(ocr, outstream=protocol_out, cache_mode=cache_mode, max_jobs=args.max_jobs,
+                  max_queued=args.queue_size, job_timeout=args.job_timeout,
+                  include_full_text=not args.no_full_text)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            ocr.close()
+        return
+    
+    if args.batch or args.manifest:
+        files = collect_batch_inputs(args.file_path, args.manifest)
+        if not files:
+            parser.error('no input files found')
+        ocr = OCRPipeline(**pipeline_options)
+        try:
+            summary = run_batch(ocr, files, args.output_dir, args.format,
+                                workers=args.batch_workers, cache_mode=cache_mode,
+                                include_full_text=not args.no_full_text)
+        finally:
+            ocr.close()
+        print(json.dumps({'success': True, **summary}))
+        return
+    
+    if not args.file_path:
+        parser.error('the following arguments are required: file_path')
+    if len(args.file_path) > 1:
+        parser.error('use --batch to process more than one file')
+    
+    file_path = args.file_path[0]
     
     if not os.path.exists(file_path):
         print(json.dumps({
@@ -516,39 +1410,27 @@ def main():
     
     try:
         # Initialize OCR pipeline
-        ocr = OCRPipeline()
+        ocr = OCRPipeline(**pipeline_options)
         
         # Process the file
-        result = ocr.process_file(file_path)
-        
-        # Check if processing failed
-        if result.get('error'):
-            response = {
-                'success': False,
-                'error': result.get('error_message', 'Unknown processing error')
-            }
+        if args.stream:
+            records = ocr.iter_process_file(file_path, cache_mode=cache_mode, profile=args.profile,
+                                            include_full_text=not args.no_full_text)
+            while True:
+                try:
+                    print(json.dumps(next(records)), flush=True)
+                except StopIteration as stop:
+                    result = stop.value
+                    break
         else:
-            # Format response for frontend
-            extracted_text = result.get('extraction_results', {}).get('extracted_text', '')
-            raw_text = result.get('extraction_results', {}).get('raw_text', '')
-            corrected_text = result.get('extraction_results', {}).get('corrected_text', '')
-            ai_analysis = result.get('ai_analysis', {})
-            
-            response = {
-                'success': True,
-                'finalExtractedText': extracted_text,
-                'originalOcrOutput': raw_text,
-                'enhancedTextNltk': corrected_text,
-                'wordCount': ai_analysis.get('word_count', len(extracted_text.split())),
-                'readingTime': ai_analysis.get('estimated_reading_time', max(1, len(extracted_text.split()) // 200)),
-                'confidenceScore': ai_analysis.get('confidence_score', 0.85),
-                'concepts': ai_analysis.get('concepts', []),
-                'keyTopics': ai_analysis.get('key_topics', []),
-                'difficulty': ai_analysis.get('difficulty', 'Intermediate'),
-                'processingMetadata': result.get('processing_metadata', {}),
-                'fileInfo': result.get('extraction_results', {})
-            }
+            result = ocr.process_file(file_path, cache_mode=cache_mode, profile=args.profile,
+                                      include_full_text=not args.no_full_text)
+        ocr.save_caches()
+        ocr.close()
         
+        response = format_response(result)
+        if args.stream:
+            response = {'type': 'result', **response}
         print(json.dumps(response))
         
     except Exception as e:
@@ -559,4 +1441,4 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-page choice of extraction route for PDFs
+
+Comparing what a page's native text layer covers with where its images sit
+decides, before any image is decoded, which of three routes a page takes:
+
+    native       the text layer has the content; embedded images are pictures of
+                 text that is already there (searchable scans, re-typeset
+                 screenshots) or there are none, so nothing is OCR'd
+    image_ocr    embedded images not covered by native text are OCR'd
+    page_render  no usable text layer and no single image holding the page (no
+                 images, vector-outlined text, tiled or striped scans), so the
+                 whole page is rasterised at render_dpi and OCR'd once
+"""
+NATIVE = 'native'
+IMAGE_OCR = 'image_ocr'
+PAGE_RENDER = 'page_render'
+ROUTES = (NATIVE, IMAGE_OCR, PAGE_RENDER)
+
+# Fewer native characters than this means the page has no real text layer
+MIN_NATIVE_CHARS = 20
+# Fraction of an image's area under native words above which its text is already extracted
+COVERED_TEXT_FRACTION = 0.1
+# Fraction of the page one image must cover to be the page scan itself
+SCAN_IMAGE_FRACTION = 0.8
+RENDER_DPI = 300
+
+
+def _area(rect):
+    return max(0.0, rect[2] - rect[0]) * max(0.0, rect[3] - rect[1])
+
+
+def _overlap(a, b):
+    return _area((max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])))
+
+
+def _image_rect(page, xref):
+    """Bounding box of every placement of an image on the page, or None if not placed"""
+    try:
+        rects = page.get_image_rects(xref)
+    except Exception:
+        return None
+    if not rects:
+        return None
+    return (min(r.x0 for r in rects), min(r.y0 for r in rects),
+            max(r.x1 for r in rects), max(r.y1 for r in rects))
+
+
+def text_coverage(rect, word_rects):
+    """Fraction of rect's area covered by native word boxes"""
+    area = _area(rect)
+    if not area:
+        return 0.0
+    return min(1.0, sum(_overlap(rect, w) for w in word_rects) / area)
+
+
+def route_page(page, text, image_refs):
+    """(route, {image index: skip reason}) for a fitz page
+
+    image_refs are page.get_images(full=True) entries; images are numbered from 1
+    in that order, as in the page's OCR blocks. On the page_render route every
+    embedded image is skipped, since the rendered page contains them.
+    """
+    native_chars = len(''.join(text.split()))
+    if not image_refs:
+        return (PAGE_RENDER if native_chars == 0 else NATIVE), {}
+
+    rects = {i: _image_rect(page, ref[0]) for i, ref in enumerate(image_refs, 1)}
+
+    if native_chars < MIN_NATIVE_CHARS:
+        page_area = _area(tuple(page.rect))
+        placed = [rect for rect in rects.values() if rect]
+        if len(image_refs) == 1 and placed and page_area and \
+                _overlap(placed[0], tuple(page.rect)) / page_area >= SCAN_IMAGE_FRACTION:
+            return IMAGE_OCR, {}
+        return PAGE_RENDER, {i: 'rendered_with_page' for i in rects}
+
+    word_rects = [w[:4] for w in page.get_text('words')]
+    skip = {i: 'covered_by_native_text' for i, rect in rects.items()
+            if rect and text_coverage(rect, word_rects) >= COVERED_TEXT_FRACTION}
+    return (NATIVE if len(skip) == len(rects) else IMAGE_OCR), skip
@@ -0,0 +1,152 @@
+"""
+Content-addressed on-disk cache of OCR results
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+# Puts between rescans of the directory, which pick up entries written or removed
+# by other processes sharing the cache
+RESCAN_PUTS = 1000
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_key(content_digest, config):
+    """Combine a content digest with the pipeline version/config into a cache key"""
+    payload = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(f"{content_digest}:{payload}".encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Directory of JSON entries keyed by content hash + pipeline config
+
+    Document results live in <directory>/<key>.json and page results in
+    <directory>/pages/<key>.json. Entries are touched on every hit and the least
+    recently used ones are evicted once the directory grows past max_bytes.
+    The directory's size is tracked in memory from one scan, so a put only
+    lists and stats the entries when the cache is over budget (or every
+    RESCAN_PUTS puts).
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # bytes in the cache, scanned on first put
+        self._puts = 0
+
+    def _path(self, key, kind):
+        if kind == 'page':
+            return os.path.join(self.directory, 'pages', f'{key}.json')
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key, kind='document'):
+        """Cached entry or None"""
+        path = self._path(key, kind)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, entry, kind='document'):
+        """Atomically store an entry, then evict if over budget"""
+        path = self._path(key, kind)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            size = _size(tmp_path)
+            replaced = _size(path)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._puts += 1
+            if self._total is None or self._puts % RESCAN_PUTS == 0:
+                self._total = sum(size for _, size, _ in self._entries())
+            else:
+                self._total += size - replaced
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def invalidate(self, key, kind='document'):
+        path = self._path(key, kind)
+        size = _size(path)
+        try:
+            os.unlink(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._total is not None:
+                self._total = max(0, self._total - size)
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._total = None
+
+    def _entries(self):
+        """(path, size, mtime) for every cached entry"""
+        entries = []
+        for directory in (self.directory, os.path.join(self.directory, 'pages')):
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._total = total
+
+
+def _size(path):
+    """Size of a file in bytes, 0 if it does not exist"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
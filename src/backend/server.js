@@ -5,13 +5,168 @@ import cors from "cors";
 import path from "path";
 import fs from "fs";
 import { spawn } from "child_process";
+import { randomUUID } from "crypto";
 import { fileURLToPath } from "url";
+import { OcrWorkerPool } from "./ocrWorkerPool.js";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
 const app = express();
 const PORT = 5001;
+const OCR_WORKERS = parseInt(process.env.OCR_WORKERS ?? "2", 10);
+// Documents each worker processes at once, and how many more it queues
+// before answering "busy"
+const OCR_MAX_JOBS = parseInt(process.env.OCR_MAX_JOBS ?? "1", 10);
+const OCR_QUEUE_SIZE = parseInt(process.env.OCR_QUEUE_SIZE ?? "8", 10);
+// Default wall-clock limit per job, in seconds
+const OCR_JOB_TIMEOUT = parseFloat(process.env.OCR_JOB_TIMEOUT ?? "600");
+
+// Resident OCR workers load the NLTK corpora once instead of once per upload
+const ocrPool =
+	OCR_WORKERS > 0
+		? new OcrWorkerPool({
+				size: OCR_WORKERS,
+				cwd: __dirname,
+				maxJobs: OCR_MAX_JOBS,
+				queueSize: OCR_QUEUE_SIZE,
+				jobTimeout: OCR_JOB_TIMEOUT,
+		  }).start()
+		: null;
+
+// One-shot processes in flight (OCR_WORKERS=0), by job id
+const oneShotJobs = new Map();
+
+// HTTP status for jobs the worker did not complete
+const JOB_STATUS_CODES = { busy: 503, timeout: 504, cancelled: 409 };
+
+// Run OCR on a file, resolving with the parsed Python response.
+// onProgress, when given, receives a record per processed page;
+// profile attaches a cProfile summary to processingMetadata.profile;
+// jobId identifies the job for cancelOcr(); priority and timeout
+// (seconds) override the worker defaults.
+function runOcr(
+	filePath,
+	{
+		onProgress = null,
+		cacheMode = "use",
+		profile = false,
+		jobId = randomUUID(),
+		priority = null,
+		timeout = null,
+	} = {}
+) {
+	if (ocrPool) {
+		return ocrPool.run(filePath, {
+			onProgress,
+			cacheMode,
+			profile,
+			jobId,
+			priority,
+			timeout,
+		});
+	}
+
+	// One-shot fallback (OCR_WORKERS=0): spawn a Python process per upload,
+	// at most OCR_MAX_JOBS at once, killed after the timeout or on cancel
+	if (oneShotJobs.size >= OCR_MAX_JOBS) {
+		return Promise.resolve({
+			success: false,
+			status: "busy",
+			error: "OCR is busy, try again shortly",
+		});
+	}
+	return new Promise((resolve, reject) => {
+		const args = ["run", "python", "ocr_wrapper.py"];
+		if (onProgress) args.push("--stream");
+		if (cacheMode === "bypass") args.push("--no-cache");
+		if (cacheMode === "refresh") args.push("--refresh-cache");
+		if (profile) args.push("--profile");
+		args.push(filePath);
+
+		const pythonProcess = spawn("uv", args, {
+			cwd: __dirname,
+			stdio: ["pipe", "pipe", "pipe"],
+		});
+		const job = { process: pythonProcess, status: null };
+		oneShotJobs.set(jobId, job);
+		const limit = timeout || OCR_JOB_TIMEOUT;
+		const timer = limit
+			? setTimeout(() => {
+					job.status = "timeout";
+					pythonProcess.kill();
+			  }, limit * 1000)
+			: null;
+
+		let pythonOutput = "";
+		let pythonError = "";
+
+		pythonProcess.stdout.on("data", (data) => {
+			pythonOutput += data.toString();
+
+			// In streaming mode every complete line but the last is a page record
+			if (onProgress) {
+				const lines = pythonOutput.split("\n");
+				pythonOutput = lines.pop();
+				for (const line of lines) {
+					let record;
+					try {
+						record = JSON.parse(line);
+					} catch (err) {
+						continue; // not a protocol line
+					}
+					if (record.type === "page") onProgress(record);
+					else pythonOutput = line;
+				}
+			}
+		});
+
+		pythonProcess.stderr.on("data", (data) => {
+			pythonError += data.toString();
+		});
+
+		pythonProcess.on("close", (code) => {
+			console.log(`🐍 Python process exited with code: ${code}`);
+			clearTimeout(timer);
+			oneShotJobs.delete(jobId);
+
+			if (job.status) {
+				return resolve({
+					success: false,
+					status: job.status,
+					error: `Job ${job.status === "timeout" ? "timed out" : "cancelled"}`,
+				});
+			}
+			if (code !== 0) {
+				return reject(new Error(pythonError || `exit code ${code}`));
+			}
+
+			try {
+				const { type, ...response } = JSON.parse(pythonOutput);
+				resolve(response);
+			} catch (parseError) {
+				console.error("📄 Raw Python output:", pythonOutput);
+				reject(parseError);
+			}
+		});
+
+		pythonProcess.on("error", (error) => {
+			clearTimeout(timer);
+			oneShotJobs.delete(jobId);
+			reject(error);
+		});
+	});
+}
+
+// Cancel a queued or running OCR job; resolves with whether it was found
+async function cancelOcr(jobId) {
+	if (ocrPool) return ocrPool.cancel(jobId);
+	const job = oneShotJobs.get(jobId);
+	if (!job) return false;
+	job.status = "cancelled";
+	job.process.kill();
+	return true;
+}
 
 // Middleware
 app.use(cors());
@@ -118,6 +273,17 @@ app.get("/api/ocr/results", (req, res) => {
 	}
 });
 
+// One log line per document with its per-stage timings, to spot slow uploads
+function logOcrTimings(fileName, metadata) {
+	const timings = metadata && metadata.timings;
+	if (!timings) return;
+	const stages = Object.entries(timings.stages)
+		.map(([name, stage]) => `${name}=${stage.seconds}s`)
+		.join(" ");
+	console.log(`⏱️ OCR ${fileName}: ${stages}`, JSON.stringify(timings.counters));
+	if (metadata.profile) console.log(metadata.profile);
+}
+
 // OCR processing endpoint
 app.post("/api/ocr/process", upload.single("file"), (req, res) => {
 	console.log("📄 OCR processing request received");
@@ -132,44 +298,75 @@ app.post("/api/ocr/process", upload.single("file"), (req, res) => {
 	console.log(`📁 Processing file: ${originalFileName}`);
 	console.log(`💾 Saved to: ${filePath}`);
 
-	// Spawn Python process to handle OCR
-	const pythonProcess = spawn(
-		"uv",
-		["run", "python", "ocr_wrapper.py", filePath],
-		{
-			cwd: __dirname,
-			stdio: ["pipe", "pipe", "pipe"],
+	// The job id lets clients cancel via POST /api/ocr/cancel/:id
+	const jobId = randomUUID();
+	res.setHeader("X-OCR-Job-Id", jobId);
+
+	// ?stream=1 answers with NDJSON: a progress line per page, then the result
+	const streamProgress = req.query.stream === "1";
+	let onProgress = null;
+	if (streamProgress) {
+		res.setHeader("Content-Type", "application/x-ndjson");
+		onProgress = (record) => {
+			res.write(
+				JSON.stringify({
+					type: "progress",
+					page: record.page,
+					pageCount: record.page_count,
+					wordCount: record.running_word_count,
+				}) + "\n"
+			);
+		};
+	}
+	const sendResult = (status, body) => {
+		if (streamProgress) {
+			res.end(JSON.stringify({ type: "result", status, ...body }) + "\n");
+		} else {
+			res.status(status).json(body);
+		}
+	};
+
+	// ?cache=refresh recomputes a cached result, ?cache=bypass skips the cache
+	const cacheMode = ["refresh", "bypass"].includes(req.query.cache)
+		? req.query.cache
+		: "use";
+
+	// ?profile=1 attaches a Python profile to the result metadata
+	const profile = req.query.profile === "1";
+
+	// ?priority=high|normal|low overrides the size-based queue priority,
+	// ?timeout=<seconds> the default job time limit
+	const priority = ["high", "normal", "low"].includes(req.query.priority)
+		? req.query.priority
+		: null;
+	const timeout = parseFloat(req.query.timeout) || null;
+
+	// A client that disconnects before the result no longer needs the job
+	res.on("close", () => {
+		if (!res.writableFinished) {
+			cancelOcr(jobId).catch(() => {});
 		}
-	);
-
-	let pythonOutput = "";
-	let pythonError = "";
-
-	pythonProcess.stdout.on("data", (data) => {
-		pythonOutput += data.toString();
-	});
-
-	pythonProcess.stderr.on("data", (data) => {
-		pythonError += data.toString();
 	});
 
-	pythonProcess.on("close", (code) => {
-		console.log(`🐍 Python process exited with code: ${code}`);
-
-		if (code !== 0) {
-			console.error("❌ Python process error:", pythonError);
-			return res.status(500).json({
-				error: "OCR processing failed",
-				details: pythonError,
-			});
-		}
+	// Hand the file to a resident OCR worker
+	runOcr(filePath, { onProgress, cacheMode, profile, jobId, priority, timeout })
+		.then((pythonResult) => {
+			const statusCode = JOB_STATUS_CODES[pythonResult.status];
+			if (statusCode) {
+				console.warn(`⚠️ OCR job ${jobId} ${pythonResult.status}`);
+				if (statusCode === 503) res.setHeader("Retry-After", "5");
+				return sendResult(statusCode, {
+					error: pythonResult.error,
+					status: pythonResult.status,
+					jobId,
+				});
+			}
 
-		try {
 			console.log(
 				"📤 Python output:",
-				pythonOutput.substring(0, 200) + "..."
+				JSON.stringify(pythonResult).substring(0, 200) + "..."
 			);
-			const pythonResult = JSON.parse(pythonOutput);
+			logOcrTimings(originalFileName, pythonResult.processingMetadata);
 
 			// Transform the response to match frontend expectations
 			const transformedResult = {
@@ -236,35 +433,61 @@ app.post("/api/ocr/process", upload.single("file"), (req, res) => {
 				`💾 OCR result automatically saved to: ${resultFileName}`
 			);
 
-			res.json(transformedResult);
-		} catch (parseError) {
-			console.error("❌ Error parsing Python output:", parseError);
-			console.error("📄 Raw Python output:", pythonOutput);
-			res.status(500).json({
-				error: "Failed to parse OCR results",
-				details: parseError.message,
+			sendResult(200, transformedResult);
+		})
+		.catch((error) => {
+			console.error("❌ OCR processing error:", error);
+			sendResult(500, {
+				error: "OCR processing failed",
+				details: error.message,
 			});
-		}
+		})
+		.finally(() => {
+			// Clean up uploaded file
+			try {
+				fs.unlinkSync(filePath);
+				console.log("🗑️ Temporary file cleaned up");
+			} catch (cleanupError) {
+				console.warn(
+					"⚠️ Failed to clean up temporary file:",
+					cleanupError.message
+				);
+			}
+		});
+});
 
-		// Clean up uploaded file
-		try {
-			fs.unlinkSync(filePath);
-			console.log("🗑️ Temporary file cleaned up");
-		} catch (cleanupError) {
-			console.warn(
-				"⚠️ Failed to clean up temporary file:",
-				cleanupError.message
-			);
+// Queue depth and latency of the OCR workers
+app.get("/api/ocr/stats", async (req, res) => {
+	try {
+		if (!ocrPool) {
+			return res.json({
+				workers: [],
+				queued: 0,
+				running: oneShotJobs.size,
+			});
 		}
-	});
+		res.json(await ocrPool.stats());
+	} catch (error) {
+		console.error("❌ Error reading OCR stats:", error);
+		res.status(500).json({
+			error: "Failed to read OCR stats",
+			details: error.message,
+		});
+	}
+});
 
-	pythonProcess.on("error", (error) => {
-		console.error("❌ Failed to start Python process:", error);
+// Cancel a queued or running OCR job by the id from X-OCR-Job-Id
+app.post("/api/ocr/cancel/:id", async (req, res) => {
+	try {
+		const cancelled = await cancelOcr(req.params.id);
+		res.status(cancelled ? 200 : 404).json({ jobId: req.params.id, cancelled });
+	} catch (error) {
+		console.error("❌ Error cancelling OCR job:", error);
 		res.status(500).json({
-			error: "Failed to start OCR processing",
+			error: "Failed to cancel OCR job",
 			details: error.message,
 		});
-	});
+	}
 });
 
 // Get specific OCR result by filename
@@ -353,5 +576,7 @@ app.listen(PORT, () => {
 	console.log(`� Get specific OCR result: GET /api/ocr/result/:filename`);
 	console.log(`📝 Update OCR results: PUT /api/ocr/update/:filename`);
 	console.log(`📋 List OCR results: GET /api/ocr/results`);
+	console.log(`📊 OCR queue stats: GET /api/ocr/stats`);
+	console.log(`🛑 Cancel OCR job: POST /api/ocr/cancel/:id`);
 	console.log(`💚 Health check: GET /api/health`);
 });
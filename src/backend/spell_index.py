@@ -0,0 +1,110 @@
+"""
+Symmetric-delete (SymSpell-style) candidate index for spell correction
+"""
+from edit_distance import levenshtein, batch_levenshtein, np
+
+# Below this many candidates the per-pair bit-parallel kernel beats NumPy setup cost
+BATCH_MIN_CANDIDATES = 24
+
+
+def delete_variants(term, max_distance):
+    """All strings reachable by deleting up to max_distance characters from term"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i+1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class SymSpellIndex:
+    """Precomputed candidate index over a dictionary for bounded edit-distance lookups
+    
+    Each dictionary word is stored under every string obtained by deleting up to
+    max_distance characters from its first prefix_length characters. Two words within
+    edit distance d always share such a delete variant, so a lookup only generates the
+    query's own deletes, collects the words posted under them and verifies that small
+    candidate set with a real edit distance instead of scanning the whole dictionary.
+    """
+    
+    def __init__(self, words, word_freq=None, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        word_freq = word_freq or {}
+        
+        # Word ids are positions in the sorted word list
+        self.words = sorted(words)
+        self.freqs = [word_freq.get(w, 1) for w in self.words]
+        
+        # delete variant -> word id, or list of word ids when shared
+        self.deletes = {}
+        for word_id, word in enumerate(self.words):
+            for key in delete_variants(word[:prefix_length], max_distance):
+                posting = self.deletes.get(key)
+                if posting is None:
+                    self.deletes[key] = word_id
+                elif type(posting) is int:
+                    self.deletes[key] = [posting, word_id]
+                else:
+                    posting.append(word_id)
+    
+    @classmethod
+    def from_tables(cls, words, freqs, deletes, max_distance=2, prefix_length=7):
+        """Wrap prebuilt tables (e.g. a memory-mapped lexicon snapshot) without rebuilding
+        
+        words and freqs are indexable by word id; deletes maps a delete variant to a
+        word id or a sequence of word ids.
+        """
+        index = cls.__new__(cls)
+        index.max_distance = max_distance
+        index.prefix_length = prefix_length
+        index.words = words
+        index.freqs = freqs
+        index.deletes = deletes
+        return index
+    
+    def __len__(self):
+        return len(self.words)
+    
+    def candidates(self, word, max_d):
+        """Yield (candidate, distance, frequency) for every dictionary word within max_d"""
+        if max_d > self.max_distance:
+            raise ValueError(f"max_d={max_d} exceeds index max_distance={self.max_distance}")
+        
+        seen = set()
+        word_ids = []
+        for key in delete_variants(word[:self.prefix_length], max_d):
+            posting = self.deletes.get(key)
+            if posting is None:
+                continue
+            for word_id in ((posting,) if type(posting) is int else posting):
+                if word_id not in seen:
+                    seen.add(word_id)
+                    word_ids.append(word_id)
+        
+        names = [self.words[i] for i in word_ids]
+        keep = [k for k, name in enumerate(names) if abs(len(name) - len(word)) <= max_d]
+        names = [names[k] for k in keep]
+        word_ids = [word_ids[k] for k in keep]
+        
+        # Score large candidate sets in one vectorised pass, small ones pair by pair
+        if np is not None and len(names) >= BATCH_MIN_CANDIDATES:
+            distances = batch_levenshtein(word, names, max_d).tolist()
+        else:
+            distances = [levenshtein(word, name, max_d) for name in names]
+        
+        for word_id, name, dist in zip(word_ids, names, distances):
+            if dist <= max_d:
+                yield name, dist, self.freqs[word_id]
+    
+    def lookup(self, word, max_d=2):
+        """Best correction ranked by (distance, -frequency), or None if nothing is close enough
+        
+        Ties are broken alphabetically so results do not depend on set iteration order.
+        """
+        best = None
+        for candidate, dist, freq in self.candidates(word, max_d):
+            rank = (dist, -freq, candidate)
+            if best is None or rank < best:
+                best = rank
+        return best[2] if best else None
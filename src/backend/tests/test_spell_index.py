@@ -0,0 +1,58 @@
+"""
+SymSpellIndex.lookup must pick the same correction as the linear dictionary scan
+
+Runs on a seeded synthetic dictionary, so it needs neither NLTK data nor a word
+list; benchmarks/bench_spell_check.py runs the same comparison on a real one.
+"""
+import os
+import sys
+import random
+from collections import Counter
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+from spell_index import SymSpellIndex
+from bench_spell_check import linear_spell_check, make_queries
+
+
+def make_dictionary(size=1500, seed=7):
+    """Words over a small alphabet, so most queries have several close candidates
+
+    Frequencies come from a narrow range so ties on (distance, frequency) are
+    common and the alphabetical tie-break is exercised too.
+    """
+    rng = random.Random(seed)
+    letters = 'aeioulnrstmdc'
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    word_freq = Counter({w: rng.randint(1, 5) for w in sorted(words) if rng.random() < 0.7})
+    return words, word_freq
+
+
+@pytest.fixture(scope='module')
+def dictionary():
+    words, word_freq = make_dictionary()
+    return words, word_freq, SymSpellIndex(words, word_freq, max_distance=2)
+
+
+@pytest.mark.parametrize('max_d', [1, 2])
+def test_lookup_matches_linear_scan(dictionary, max_d):
+    words, word_freq, index = dictionary
+    mismatches = []
+    for query in make_queries(words, 150, seed=1234):
+        expected = linear_spell_check(query, words, word_freq, max_d)
+        actual = index.lookup(query, max_d) or query
+        if actual != expected:
+            mismatches.append((query, expected, actual))
+    assert not mismatches
+
+
+def test_dictionary_words_are_their_own_correction(dictionary):
+    words, word_freq, index = dictionary
+    for word in sorted(words)[:100]:
+        assert index.lookup(word, 2) == linear_spell_check(word, words, word_freq, 2) == word
@@ -2,7 +2,12 @@ import React, { useState, useEffect } from "react";
 import { Camera, Upload, History, FileText, Calendar } from "lucide-react";
 import "../styles/OcrPage.css";
 
-const OCRPage = ({ handleFileUpload, setCurrentPage, setOcrResult }) => {
+const OCRPage = ({
+	handleFileUpload,
+	ocrProgress,
+	setCurrentPage,
+	setOcrResult,
+}) => {
 	const [isDragOver, setIsDragOver] = useState(false);
 	const [isProcessing, setIsProcessing] = useState(false);
 	const [ocrHistory, setOcrHistory] = useState([]);
@@ -114,7 +119,9 @@ const OCRPage = ({ handleFileUpload, setCurrentPage, setOcrResult }) => {
 							<div className="spinner"></div>
 							<h3 className="processingTitle">Processing...</h3>
 							<p className="processingText">
-								Extracting text and analyzing content
+								{ocrProgress
+									? `Page ${ocrProgress.page} of ${ocrProgress.pageCount} · ${ocrProgress.wordCount} words extracted`
+									: "Extracting text and analyzing content"}
 							</p>
 						</div>
 					) : (